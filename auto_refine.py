@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import argparse, time
+import numpy as np
+
+from grids import make_grids, GRID_KINDS
+from dp_asian import DPSolverAsian, INTERPS
+
+
+def ladder(NS0, NA0, ratio, levels):
+    """Geometric ladder of odd (NS, NA) sizes, so that S0 stays on a node of symmetric grids."""
+    out = []
+    for l in range(levels):
+        NS = 2 * int(round((NS0 - 1) * ratio**l / 2)) + 1
+        NA = 2 * int(round((NA0 - 1) * ratio**l / 2)) + 1
+        out.append((NS, NA))
+    return out
+
+
+def richardson(prices, ratio, p_min=0.5, p_max=4.0):
+    """Order estimate and extrapolated price from the last three levels of a geometric ladder.
+
+    Returns (price, error_estimate, order). When the last two differences do not shrink
+    with a consistent sign the ladder is not yet asymptotic: no extrapolation, and the
+    last difference is the error estimate. Otherwise the estimate is the larger of the
+    Richardson correction and the change from the previous extrapolated price.
+    """
+    if len(prices) < 2:
+        return prices[-1], np.inf, np.nan
+    d2 = prices[-1] - prices[-2]
+    if len(prices) < 3:
+        return prices[-1], abs(d2), np.nan
+    d1 = prices[-2] - prices[-3]
+    if d2 == 0.0:
+        return prices[-1], 0.0, np.nan
+    if d1 * d2 <= 0 or abs(d2) >= abs(d1):
+        return prices[-1], abs(d2), np.nan
+    p = float(np.clip(np.log(abs(d1 / d2)) / np.log(ratio), p_min, p_max))
+    corr = d2 / (ratio**p - 1.0)
+    err = abs(corr)
+    if len(prices) >= 4:
+        # the shift from the previous level's extrapolation guards against a lucky order estimate
+        prev, _, p_prev = richardson(prices[:-1], ratio, p_min, p_max)
+        if not np.isnan(p_prev):
+            err = max(err, abs(prices[-1] + corr - prev))
+    return prices[-1] + corr, err, p
+
+
+def price_to_tolerance(S0, K, r, q, sigma, T, N, tol, is_call=True, A0=None,
+                       monitor_schedule=None, exercise_schedule=None,
+                       NS0=41, NA0=31, ratio=1.5, min_levels=3, max_levels=7, Kgh=7, kgrid=3.0,
+                       grid="sinh", verbose=False, **solver_opts):
+    """Refine (NS, NA) along a geometric ladder until the Richardson error estimate is below tol.
+
+    N, the monitoring schedule and Kgh are part of the contract/quadrature and are kept
+    fixed; only the spatial grid is refined. Every level's price is kept and enters the
+    order estimate, so each new level costs one solve. At least min_levels levels are
+    solved so that an order estimate exists. The default sinh grids keep the strike on a
+    node at every level, which makes the ladder far more regular than uniform grids.
+    Returns a dict with the extrapolated price, its error estimate, the order, a
+    converged flag and per-level sizes, prices and runtimes.
+    """
+    A0 = S0 if A0 is None else A0
+    monitor_schedule = list(range(1, N+1)) if monitor_schedule is None else monitor_schedule
+    levels, prices = [], []
+    price, err, order = np.nan, np.inf, np.nan
+    t_start = time.perf_counter()
+    for NS, NA in ladder(NS0, NA0, ratio, max_levels):
+        Sg, Ag = make_grids(grid, S0, sigma, T, NS, NA, K=K, r=r, q=q, k=kgrid)
+        solver = DPSolverAsian(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=is_call,
+                               K_gh=Kgh, monitor_schedule=monitor_schedule,
+                               exercise_schedule=exercise_schedule, **solver_opts)
+        t0 = time.perf_counter()
+        p, _ = solver.price(S0=S0, A0=A0)
+        dt = time.perf_counter() - t0
+        prices.append(p)
+        price, err, order = richardson(prices, ratio)
+        levels.append({"NS": NS, "NA": NA, "price": p, "runtime_s": dt,
+                       "extrapolated": price, "error_estimate": err, "order": order})
+        if verbose:
+            print(f"NS={NS:4d} NA={NA:4d}: DP={p:.6f}  extrap={price:.6f}  err~{err:.2e}  "
+                  f"order={order:.2f}  ({dt:.2f}s)")
+        if err <= tol and len(levels) >= min_levels:
+            break
+    return {"price": price, "error_estimate": err, "order": order,
+            "converged": bool(err <= tol and len(levels) >= min_levels),
+            "tol": tol, "levels": levels, "total_runtime_s": time.perf_counter() - t_start}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="DP price to a target tolerance with Richardson extrapolation")
+    ap.add_argument("--S0", type=float, default=100.0)
+    ap.add_argument("--A0", type=float, default=None)
+    ap.add_argument("--K", type=float, default=100.0)
+    ap.add_argument("--r", type=float, default=0.05)
+    ap.add_argument("--q", type=float, default=0.0)
+    ap.add_argument("--sigma", type=float, default=0.20)
+    ap.add_argument("--T", type=float, default=1.0)
+    ap.add_argument("--N", type=int, default=60)
+    ap.add_argument("--put", action="store_true")
+    ap.add_argument("--exercise", type=str, default="", help="'' (European), 'all', or comma-separated steps")
+    ap.add_argument("--tol", type=float, default=1e-3)
+    ap.add_argument("--NS0", type=int, default=41)
+    ap.add_argument("--NA0", type=int, default=31)
+    ap.add_argument("--ratio", type=float, default=1.5)
+    ap.add_argument("--min_levels", type=int, default=3)
+    ap.add_argument("--max_levels", type=int, default=7)
+    ap.add_argument("--Kgh", type=int, default=7)
+    ap.add_argument("--kgrid", type=float, default=3.0)
+    ap.add_argument("--grid", choices=GRID_KINDS, default=None,
+                    help="S/A grid kind (default: sinh; uniform with --engine fft)")
+    ap.add_argument("--interp", choices=INTERPS, default="linear")
+    ap.add_argument("--engine", choices=["vector", "sparse", "fft"], default="vector")
+    args = ap.parse_args()
+    # the fft engine convolves along S and needs an S grid uniform in log S
+    if args.grid is None:
+        args.grid = "uniform" if args.engine == "fft" else "sinh"
+    elif args.engine == "fft" and args.grid != "uniform":
+        ap.error("--engine fft needs --grid uniform")
+
+    if args.exercise == "": exercise = []
+    elif args.exercise == "all": exercise = list(range(0, args.N))
+    else: exercise = [int(x) for x in args.exercise.split(",") if x.strip()]
+    res = price_to_tolerance(args.S0, args.K, args.r, args.q, args.sigma, args.T, args.N, args.tol,
+                             is_call=not args.put, A0=args.A0, exercise_schedule=exercise,
+                             NS0=args.NS0, NA0=args.NA0, ratio=args.ratio,
+                             min_levels=args.min_levels, max_levels=args.max_levels,
+                             Kgh=args.Kgh, kgrid=args.kgrid, grid=args.grid, verbose=True,
+                             engine=args.engine, interp=args.interp)
+    status = "met" if res["converged"] else "NOT met"
+    print(f"Price: {res['price']:.6f} ± {res['error_estimate']:.2e} (tol {args.tol:g} {status}), "
+          f"order {res['order']:.2f}, {len(res['levels'])} levels, {res['total_runtime_s']:.2f}s total")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 import argparse
-from grids import s_grid_logspace, a_grid_linear
+from grids import make_grids, GRID_KINDS
 from dp_asian import DPSolverAsian
 def main():
     p = argparse.ArgumentParser(description='DP pricer for Asian options')
@@ -11,11 +11,33 @@ def main():
     p.add_argument('--NA', type=int, default=101); p.add_argument('--steps', type=int, default=60)
     p.add_argument('--gh', type=int, default=7); p.add_argument('--kgrid', type=float, default=3.0)
     p.add_argument('--call', action='store_true')
+    p.add_argument('--grid', choices=GRID_KINDS, default='uniform',
+                   help='S/A grid generator; sinh and narrow concentrate nodes near the strike')
     p.add_argument('--monitor', type=str, default='all')
     p.add_argument('--exercise', type=str, default='')
+    p.add_argument('--engine', choices=['vector', 'sparse', 'fft', 'loop'], default='vector')
+    p.add_argument('--op_cache', type=str, default=None)
+    p.add_argument('--fuse', action='store_true', help='merge unmonitored, non-exercise steps')
+    p.add_argument('--exercise_band', type=int, default=None,
+                   help='safety margin (nodes, >= 1) for skipping continuation deep in the exercise region')
+    p.add_argument('--verify_band', action='store_true')
+    p.add_argument('--prune_sd', type=float, default=None,
+                   help='only evaluate nodes reachable from (S0, A0) within this many std devs')
+    p.add_argument('--workers', type=int, default=1, help='threads evaluating row tiles of each step')
+    p.add_argument('--dtype', choices=['float64', 'float32'], default='float64',
+                   help='storage precision of value surfaces, weights and operators')
+    p.add_argument('--check_precision', action='store_true', help='also price in float64 and report the difference')
+    p.add_argument('--backend', choices=['auto', 'numpy', 'numba'], default='auto',
+                   help='vector-engine kernel; auto uses numba when it is installed')
+    p.add_argument('--interp', choices=['linear', 'pchip', 'pchip_a'], default='linear',
+                   help='value-surface interpolation (pchip schemes need --engine vector)')
+    p.add_argument('--greeks', action='store_true',
+                   help='delta/gamma/dV_dA/theta from the solved surfaces, vega/rho from one batched bump run')
+    p.add_argument('--store', type=str, default=None,
+                   help='directory of memory-mapped value surfaces; a repeated solve becomes a lookup')
     args = p.parse_args()
-    Sg = s_grid_logspace(args.S0, args.sigma, args.T, k=args.kgrid, NS=args.NS)
-    Ag = a_grid_linear(Sg, NA=args.NA)
+    Sg, Ag = make_grids(args.grid, args.S0, args.sigma, args.T, args.NS, args.NA, K=args.K,
+                        r=args.r, q=args.q, k=args.kgrid)
     A0 = args.S0 if args.A0 is None else args.A0
     monitor = list(range(1, args.steps+1)) if args.monitor=='all' else [int(x) for x in args.monitor.split(',') if x.strip()]
     if args.exercise=='': exercise=[]
@@ -23,8 +45,32 @@ def main():
     else: exercise=[int(x) for x in args.exercise.split(',') if x.strip()]
     solver = DPSolverAsian(Sg, Ag, T=args.T, N=args.steps, r=args.r, q=args.q, sigma=args.sigma,
                            K=args.K, is_call=args.call, K_gh=args.gh,
-                           monitor_schedule=monitor, exercise_schedule=exercise)
-    price, _ = solver.price(S0=args.S0, A0=A0, return_frontier=False)
+                           monitor_schedule=monitor, exercise_schedule=exercise,
+                           engine=args.engine, op_cache=args.op_cache,
+                           fuse_steps=args.fuse, prune_sd=args.prune_sd,
+                           exercise_band=args.exercise_band, verify_band=args.verify_band,
+                           workers=args.workers, dtype=args.dtype, backend=args.backend, interp=args.interp,
+                           surface_store=args.store)
+    if args.greeks:
+        price, _, greeks = solver.price(S0=args.S0, A0=A0, return_greeks=True)
+    else:
+        price, _ = solver.price(S0=args.S0, A0=A0, return_frontier=False)
     print(f'DP price: {price:.6f}')
+    if args.greeks:
+        print('  '.join(f'{k}={v:.6f}' for k, v in greeks.items()))
+    if args.check_precision:
+        chk = solver.check_precision(S0=args.S0, A0=A0)
+        print(f"{chk['dtype']} vs float64: {chk['price_float64']:.6f}, |diff| = {chk['abs_diff']:.3e} "
+              f"(rel {chk['rel_diff']:.3e})")
+    if args.prune_sd is not None:
+        print(f"nodes skipped: {100 * solver.stats['pruned_fraction']:.1f}%")
+    if args.exercise_band is not None:
+        print(f"deep-exercise nodes skipped: {100 * solver.stats['deep_exercise_fraction']:.1f}% "
+              f"({solver.stats['band_redo_steps']} steps solved in full)")
+        if args.verify_band:
+            print(f"band check: max |V - V_full| = {solver.stats['band_max_error']:.3e}, "
+                  f"mask mismatches = {solver.stats['band_mask_mismatch']}")
+    if solver.stats.get('fused_steps'):
+        print(f"fused steps: {solver.stats['fused_steps']} ({solver.stats['steps']} transitions)")
 if __name__ == '__main__':
     main()
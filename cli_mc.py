@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 import argparse
-from mc_asian import asian_euro_mc
+from mc_asian import asian_euro_mc, asian_euro_mc_strikes, asian_lsm, CONTROLS, METHODS
 def main():
     p = argparse.ArgumentParser(description='MC baseline for European arithmetic Asian')
     p.add_argument('--S0', type=float, required=True)
@@ -13,9 +13,46 @@ def main():
     p.add_argument('--q', type=float, default=0.0)
     p.add_argument('--call', action='store_true')
     p.add_argument('--seed', type=int, default=2025)
+    p.add_argument('--chunk', type=int, default=None, help='stream paths in chunks of this size (flat memory)')
+    p.add_argument('--workers', type=int, default=1, help='processes for the streamed chunks')
+    p.add_argument('--control', choices=[c for c in CONTROLS if c], default=None,
+                   help='control variate: geometric-average Asian with closed-form price')
+    p.add_argument('--method', choices=METHODS, default='mc',
+                   help='qmc: scrambled Sobol points with Brownian-bridge paths')
+    p.add_argument('--replications', type=int, default=16, help='independent scramblings for the qmc error')
+    p.add_argument('--exercise', type=str, default='',
+                   help="'' (European), 'all' or comma-separated steps in 0..M-1: Longstaff-Schwartz")
+    p.add_argument('--train_paths', type=int, default=50000, help='LSM regression paths')
+    p.add_argument('--degree', type=int, default=2, help='LSM basis: monomials in (S/K, A/K) up to this degree')
+    p.add_argument('--strikes', type=str, default=None,
+                   help='comma-separated strikes priced on one shared set of paths (overrides --K)')
     args = p.parse_args()
-    est, (lo, hi), se = asian_euro_mc(args.S0, args.K, args.r, args.sigma, args.T, args.M,
-                                      paths=args.paths, q=args.q, call=args.call, seed=args.seed)
+    if args.strikes:
+        Ks = [float(x) for x in args.strikes.split(',') if x.strip()]
+        rows = asian_euro_mc_strikes(args.S0, Ks, args.r, args.sigma, args.T, args.M, paths=args.paths, q=args.q,
+                                     calls=args.call, seed=args.seed, chunk=args.chunk or 50000,
+                                     workers=args.workers, control=args.control, method=args.method,
+                                     replications=args.replications)
+        for row in rows:
+            print(f"K={row['K']:.4f}  MC estimate: {row['est']:.6f}  95%CI=({row['ci_lo']:.6f}, {row['ci_hi']:.6f})  "
+                  f"SE={row['se']:.6f}")
+        return
+    if args.exercise:
+        exercise = list(range(args.M)) if args.exercise == 'all' else [int(x) for x in args.exercise.split(',') if x.strip()]
+        est, (lo, hi), se, _ = asian_lsm(args.S0, args.K, args.r, args.sigma, args.T, args.M, paths=args.paths,
+                                         q=args.q, call=args.call, exercise_schedule=exercise, seed=args.seed,
+                                         train_paths=args.train_paths, degree=args.degree,
+                                         chunk=args.chunk or 50000, workers=args.workers)
+        print(f'LSM estimate (lower bound): {est:.6f}  95%CI=({lo:.6f}, {hi:.6f})  SE={se:.6f}')
+        return
+    est, (lo, hi), se, stats = asian_euro_mc(args.S0, args.K, args.r, args.sigma, args.T, args.M,
+                                             paths=args.paths, q=args.q, call=args.call, seed=args.seed,
+                                             chunk=args.chunk, workers=args.workers, control=args.control,
+                                             method=args.method, replications=args.replications,
+                                             return_stats=True)
     print(f'MC estimate: {est:.6f}  95%CI=({lo:.6f}, {hi:.6f})  SE={se:.6f}')
+    if args.control or args.method == 'qmc':
+        print(f"variance reduction x{stats['vr_factor']:.1f}  effective paths {stats['effective_paths']:.3g}"
+              + (f"  beta={stats['beta']:.4f}" if args.control else ''))
 if __name__ == '__main__':
     main()
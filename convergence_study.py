@@ -4,9 +4,12 @@ import argparse, csv, time, os
 import numpy as np
 import matplotlib.pyplot as plt
 
-from grids import s_grid_logspace, a_grid_linear
-from dp_asian import DPSolverAsian
+from grids import make_grids, GRID_KINDS
+from dp_asian import DPSolverAsian, INTERPS
+from dp_reduced import DPSolverAsianReduced
 from mc_asian import asian_euro_mc
+from result_cache import default_cache, configure, solver_fingerprint
+from sweep_executor import run_sweep
 
 
 # -----------------------------------------------------------
@@ -24,50 +27,82 @@ def ensure_dir(filepath):
 # Core Simulation Functions
 # -----------------------------------------------------------
 
-def run_dp_once(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid):
+def run_dp_once(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, grid="uniform", **solver_opts):
     """Run one DP pricing for given discretization parameters."""
-    Sg = s_grid_logspace(S0, sigma, T, k=kgrid, NS=NS)
-    Ag = a_grid_linear(Sg, NA=NA)
+    Sg, Ag = make_grids(grid, S0, sigma, T, NS, NA, K=K, r=r, q=q, k=kgrid)
     solver = DPSolverAsian(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K,
                            is_call=True, K_gh=Kgh,
                            monitor_schedule=list(range(1, N+1)),
-                           exercise_schedule=[])  # European only
-    t0 = time.perf_counter()
-    price, _ = solver.price(S0=S0, A0=S0, return_frontier=False)
-    t1 = time.perf_counter()
-    return price, (t1 - t0)
+                           exercise_schedule=[],  # European only
+                           **solver_opts)
+    def timed():
+        t0 = time.perf_counter()
+        price, _ = solver.price(S0=S0, A0=S0, return_frontier=False)
+        return price, time.perf_counter() - t0
+    # the cached runtime is that of the original solve
+    return default_cache().memo((solver_fingerprint(solver), "timed_price", S0), timed)
 
 
-def run_mc_once(S0, K, r, q, sigma, T, M, paths, seed):
+def run_mc_once(S0, K, r, q, sigma, T, M, paths, seed, **mc_opts):
     """Monte Carlo baseline for European Asian option."""
-    est, (lo, hi), se = asian_euro_mc(S0, K, r, sigma, T, M, paths=paths, q=q, call=True, seed=seed)
+    est, (lo, hi), se = default_cache().call(asian_euro_mc, S0, K, r, sigma, T, M, paths=paths, q=q, call=True,
+                                             seed=seed, **mc_opts)
     half = hi - est
     return est, half, se
 
 
-def sweep(param, values, S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, mc_paths, seed):
-    """Sweep one parameter (NS, NA, N, Kgh) and collect errors."""
-    rows = []
-    for v in values:
-        NSv, NAv, Nv, Kghv = NS, NA, N, Kgh
-        if param == "NS": NSv = int(v)
-        elif param == "NA": NAv = int(v)
-        elif param == "N": Nv = int(v)
-        elif param == "Kgh": Kghv = int(v)
-        else:
-            raise ValueError("param must be one of NS, NA, N, Kgh")
+def run_reduced_once(S0, K, r, q, sigma, T, N, Kgh, NX=20001):
+    """Grid-converged European reference from the 1D reduced-state solver."""
+    solver = DPSolverAsianReduced(None, None, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=True,
+                                  K_gh=Kgh, monitor_schedule=list(range(1, N+1)), NX=NX)
+    price, _ = default_cache().solve(solver, "price", S0=S0, A0=S0)
+    return price
 
-        dp_price, dt = run_dp_once(S0, K, r, q, sigma, T, NSv, NAv, Nv, Kghv, kgrid)
-        mc_mean, mc_half, se = run_mc_once(S0, K, r, q, sigma, T, Nv, mc_paths, seed)
-        err = abs(dp_price - mc_mean)
 
-        rows.append({
-            "param": param, "value": v,
-            "dp_price": dp_price, "mc_mean": mc_mean,
-            "mc_CI_half": mc_half, "abs_error": err, "runtime_s": dt
-        })
-        print(f"{param}={v}: DP={dp_price:.6f}, MC={mc_mean:.6f}±{mc_half:.6f}, |err|={err:.6f}")
-    return rows
+def sweep_point(param, v, S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, mc_paths, seed, grid="uniform",
+                reference="mc", mc_opts=None, **solver_opts):
+    """DP price, reference and error at one value of the swept parameter."""
+    NSv, NAv, Nv, Kghv = NS, NA, N, Kgh
+    if param == "NS": NSv = int(v)
+    elif param == "NA": NAv = int(v)
+    elif param == "N": Nv = int(v)
+    elif param == "Kgh": Kghv = int(v)
+    else:
+        raise ValueError("param must be one of NS, NA, N, Kgh")
+
+    dp_price, dt = run_dp_once(S0, K, r, q, sigma, T, NSv, NAv, Nv, Kghv, kgrid, grid=grid, **solver_opts)
+    if reference == "reduced":
+        mc_mean, mc_half = run_reduced_once(S0, K, r, q, sigma, T, Nv, Kghv), 0.0
+    else:
+        mc_mean, mc_half, se = run_mc_once(S0, K, r, q, sigma, T, Nv, mc_paths, seed, **(mc_opts or {}))
+    return {"dp_price": dp_price, "mc_mean": mc_mean, "mc_CI_half": mc_half,
+            "abs_error": abs(dp_price - mc_mean), "runtime_s": dt}
+
+
+def sweep(param, values, S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, mc_paths, seed, grid="uniform",
+          reference="mc", mc_opts=None, jobs=1, out_csv=None, tag=None, **solver_opts):
+    """Sweep one parameter (NS, NA, N, Kgh) and collect errors.
+
+    The points run through sweep_executor.run_sweep: with jobs > 1 on a process pool,
+    largest grids first, each row streamed into out_csv and rows already there skipped.
+    tag (e.g. {"interp": "pchip"}) is added to every row and to its resume key.
+    """
+    def report(row):
+        v, err = row["value"], row["abs_error"]
+        if reference == "reduced":
+            print(f"{param}={v}: DP={row['dp_price']:.6f}, ref={row['mc_mean']:.6f}, |err|={err:.6f}")
+        else:
+            print(f"{param}={v}: DP={row['dp_price']:.6f}, MC={row['mc_mean']:.6f}±{row['mc_CI_half']:.6f}, "
+                  f"|err|={err:.6f}")
+    points, costs = [], []
+    for v in values:
+        points.append((dict(tag or {}, param=param, value=v),
+                       dict(param=param, v=v, S0=S0, K=K, r=r, q=q, sigma=sigma, T=T, NS=NS, NA=NA, N=N, Kgh=Kgh,
+                            kgrid=kgrid, mc_paths=mc_paths, seed=seed, grid=grid, reference=reference,
+                            mc_opts=mc_opts, **solver_opts)))
+        size = {"NS": NS, "NA": NA, "N": N, "Kgh": Kgh, param: int(v)}
+        costs.append(size["NS"] * size["NA"] * size["N"] * size["Kgh"])
+    return run_sweep(sweep_point, points, jobs=jobs, out_csv=out_csv, costs=costs, on_row=report)
 
 
 # -----------------------------------------------------------
@@ -112,6 +147,27 @@ def plot_convergence(rows, title_prefix, out_png=None):
         plt.show()
 
 
+def plot_equal_runtime(rows_by_scheme, title_prefix, out_png=None):
+    """Plot error vs runtime of each interpolation scheme (log-log)."""
+    plt.figure(figsize=(7, 4))
+    for scheme, rows in rows_by_scheme.items():
+        plt.loglog([r["runtime_s"] for r in rows], [max(r["abs_error"], 1e-12) for r in rows],
+                   marker="o", label=scheme)
+    plt.xlabel("DP runtime (s)")
+    plt.ylabel("Absolute error")
+    plt.title(f"{title_prefix}: error vs runtime ({rows[0]['param']} sweep)")
+    plt.grid(True, which="both", alpha=0.3)
+    plt.legend()
+    plt.tight_layout()
+
+    if out_png:
+        ensure_dir(out_png)
+        plt.savefig(out_png, dpi=180, bbox_inches="tight")
+        print("Saved", out_png)
+    else:
+        plt.show()
+
+
 # -----------------------------------------------------------
 # Main
 # -----------------------------------------------------------
@@ -131,28 +187,81 @@ def main():
     ap.add_argument("--N", type=int, default=60)
     ap.add_argument("--Kgh", type=int, default=7)
     ap.add_argument("--kgrid", type=float, default=3.0)
+    ap.add_argument("--engine", choices=["vector", "sparse", "fft", "loop"], default="vector")
+    ap.add_argument("--op_cache", type=str, default=None,
+                    help="Directory for cached sparse transition operators (engine=sparse)")
+    ap.add_argument("--interp", choices=INTERPS, default="linear",
+                    help="Interpolation of the value surface (pchip/pchip_a need --engine vector)")
+    ap.add_argument("--compare_interp", type=str, default=None,
+                    help="Comma-separated schemes (e.g. linear,pchip_a,pchip) to compare at equal runtime")
+    ap.add_argument("--reference", choices=["mc", "reduced"], default="mc",
+                    help="Error reference: Monte Carlo or the grid-converged 1D reduced-state DP")
+    ap.add_argument("--grid", choices=GRID_KINDS, default="uniform",
+                    help="S/A grid generator; sinh and narrow concentrate nodes near the strike")
     # Sweep control
     ap.add_argument("--param", choices=["NS", "NA", "N", "Kgh"], default="NS")
     ap.add_argument("--values", type=str, default="81,101,121,161,201")
     # Monte Carlo
     ap.add_argument("--mc_paths", type=int, default=100000)
     ap.add_argument("--seed", type=int, default=2025)
+    ap.add_argument("--mc_chunk", type=int, default=None,
+                    help="Stream MC paths in chunks of this size (flat memory in --mc_paths)")
+    ap.add_argument("--mc_workers", type=int, default=1, help="Processes for the streamed MC chunks")
+    ap.add_argument("--mc_control", choices=["geometric"], default=None,
+                    help="Geometric-Asian control variate (far fewer --mc_paths for the same CI)")
+    ap.add_argument("--mc_method", choices=["mc", "qmc"], default="mc",
+                    help="qmc: scrambled Sobol + Brownian bridge, CI from randomized replications")
+    ap.add_argument("--mc_replications", type=int, default=16)
+    ap.add_argument("--cache_dir", type=str, default=".result_cache",
+                    help="On-disk tier of the result cache (shared by the study scripts)")
+    ap.add_argument("--no-cache", dest="no_cache", action="store_true", help="Recompute every result")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="Processes for the sweep points (largest grids first; runtimes then include contention)")
+    ap.add_argument("--no-resume", dest="resume", action="store_false",
+                    help="Recompute points already present in the output CSV")
     # Output (auto-named based on param)
     ap.add_argument("--outdir", type=str, default="convergence_figs")
     args = ap.parse_args()
 
     ensure_dir(args.outdir)
+    configure(directory=args.cache_dir, enabled=not args.no_cache)
     out_csv = os.path.join(args.outdir, f"conv_{args.param}.csv")
     out_png = os.path.join(args.outdir, f"conv_{args.param}.png")
 
     values = [int(v) for v in args.values.split(",") if v.strip()]
+    mc_opts = {"chunk": args.mc_chunk, "workers": args.mc_workers, "control": args.mc_control,
+               "method": args.mc_method, "replications": args.mc_replications}
+
+    if not args.resume:
+        for path in (out_csv, os.path.join(args.outdir, f"conv_{args.param}_interp.csv")):
+            if os.path.exists(path):
+                os.remove(path)
+
+    if args.compare_interp:
+        interp_csv = os.path.join(args.outdir, f"conv_{args.param}_interp.csv")
+        rows_by_scheme = {}
+        for scheme in [x.strip() for x in args.compare_interp.split(",") if x.strip()]:
+            rows_by_scheme[scheme] = sweep(args.param, values, args.S0, args.K, args.r, args.q,
+                                           args.sigma, args.T, args.NS, args.NA, args.N,
+                                           args.Kgh, args.kgrid, args.mc_paths, args.seed, grid=args.grid,
+                                           reference=args.reference, mc_opts=mc_opts, engine=args.engine,
+                                           op_cache=args.op_cache, interp=scheme, jobs=args.jobs,
+                                           out_csv=interp_csv, tag={"interp": scheme})
+        save_csv([r for rows in rows_by_scheme.values() for r in rows], interp_csv)
+        plot_equal_runtime(rows_by_scheme, title_prefix=f"S0={args.S0}, K={args.K}, sigma={args.sigma}",
+                           out_png=os.path.join(args.outdir, f"conv_{args.param}_interp.png"))
+        print(default_cache().summary())
+        return
 
     rows = sweep(args.param, values, args.S0, args.K, args.r, args.q,
                  args.sigma, args.T, args.NS, args.NA, args.N,
-                 args.Kgh, args.kgrid, args.mc_paths, args.seed)
+                 args.Kgh, args.kgrid, args.mc_paths, args.seed, grid=args.grid,
+                 reference=args.reference, mc_opts=mc_opts, engine=args.engine, op_cache=args.op_cache, interp=args.interp,
+                 jobs=args.jobs, out_csv=out_csv)
 
     save_csv(rows, out_csv)
     plot_convergence(rows, title_prefix=f"S0={args.S0}, K={args.K}, sigma={args.sigma}", out_png=out_png)
+    print(default_cache().summary())
 
 
 if __name__ == "__main__":
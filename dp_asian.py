@@ -1,13 +1,119 @@
+import os, hashlib
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import scipy.sparse as sp
+from scipy.signal import fftconvolve
+from scipy.special import ndtr
 from typing import Optional, Tuple, List
 from gh import gh_nodes_weights
-from interp2d import bilinear
+from interp2d import (bilinear, linear_weights, bilinear_apply_flat, pchip_slopes, hermite_weights,
+                      hermite_apply_flat, surface_derivatives)
+from dp_scenarios import DPSolverAsianScenarios
+from surface_store import SurfaceStore, surface_key
+from frontier import ExerciseFrontier
 from math import sqrt, pi
+try:
+    from numba import njit
+except ImportError:  # optional compiled backend
+    njit = None
+ENGINES = ('vector', 'sparse', 'fft', 'loop')
+BACKENDS = ('auto', 'numpy', 'numba')
+INTERPS = ('linear', 'pchip', 'pchip_a')
+def _cont_kernel(V, Sg, Ag, i0, i1, alpha, Sp, w, rows, cols, k_prev, monitored, out, bbuf):
+    # continuation sums of the vector engine node by node (GH node -> A update ->
+    # binary search -> bilinear -> weighted sum) without (NS, NA, K_gh) temporaries.
+    # V is (P, NS, NA), out is (P, len(rows), len(cols)); same operation order as
+    # linear_weights/bilinear_apply_flat
+    NA = Ag.shape[0]
+    P = V.shape[0]
+    for a in range(rows.shape[0]):
+        i = rows[a]
+        for c in range(cols.shape[0]):
+            j = cols[c]
+            for m in range(w.shape[0]):
+                ia = i0[i, m]; ib = i1[i, m]; al = alpha[i, m]
+                ja = j; jb = j; be = 0.0
+                if monitored:
+                    x = (k_prev * Ag[j] + Sp[i, m]) / (k_prev + 1)
+                    lo = 0; hi = NA
+                    while lo < hi:  # searchsorted(Ag, x, side='left')
+                        mid = (lo + hi) // 2
+                        if Ag[mid] < x:
+                            lo = mid + 1
+                        else:
+                            hi = mid
+                    if 0 < lo < NA:
+                        ja = lo - 1; jb = lo
+                        d = Ag[jb] - Ag[ja]
+                        be = (x - Ag[ja]) / d if d != 0 else 0.0
+                    else:
+                        ja = min(lo, NA - 1); jb = ja
+                bbuf[0] = be; be = bbuf[0]  # A weight in the storage dtype, as alpha
+                for p in range(P):
+                    out[p, a, c] += w[m] * ((1-al)*(1-be)*V[p, ia, ja] + al*(1-be)*V[p, ib, ja]
+                                            + (1-al)*be*V[p, ia, jb] + al*be*V[p, ib, jb])
+_cont_kernel_jit = njit(cache=True, nogil=True)(_cont_kernel) if njit is not None else None
+def _erode(mask, m):
+    # erosion by a (2m+1) x (2m+1) square, outside the grid counted as set
+    # (binary_erosion with border_value=1), as shifted ANDs along S, then A
+    out = mask.copy()
+    for d in range(1, m + 1):
+        out[d:] &= mask[:-d]; out[:-d] &= mask[d:]
+    rows = out.copy()
+    for d in range(1, m + 1):
+        out[:, d:] &= rows[:, :-d]; out[:, :-d] &= rows[:, d:]
+    return out
 class DPSolverAsian:
     def __init__(self, S_grid, A_grid, T: float, N: int, r: float, q: float, sigma: float,
                  K: float, is_call: bool, K_gh: int = 7,
                  monitor_schedule: Optional[List[int]] = None,
-                 exercise_schedule: Optional[List[int]] = None):
+                 exercise_schedule: Optional[List[int]] = None,
+                 engine: str = 'vector', op_cache: Optional[str] = None,
+                 fuse_steps: bool = False, prune_sd: Optional[float] = None,
+                 exercise_band: Optional[int] = None, verify_band: bool = False,
+                 workers: int = 1, dtype=np.float64, backend: str = 'auto', interp: str = 'linear',
+                 surface_store: Optional[str] = None):
+        if engine not in ENGINES:
+            raise ValueError(f'engine must be one of {ENGINES}')
+        if (fuse_steps or prune_sd is not None or exercise_band is not None or workers > 1) and engine == 'loop':
+            raise ValueError('fuse_steps, prune_sd, exercise_band and workers are not supported by the loop engine')
+        if surface_store is not None and (engine == 'loop' or prune_sd is not None):
+            raise ValueError('surface_store needs full surfaces: not with the loop engine or prune_sd')
+        if interp not in INTERPS:
+            raise ValueError(f'interp must be one of {INTERPS}')
+        if interp != 'linear' and engine != 'vector':
+            raise ValueError('interp pchip/pchip_a needs the vector engine')
+        if backend not in BACKENDS:
+            raise ValueError(f'backend must be one of {BACKENDS}')
+        if backend == 'numba' and _cont_kernel_jit is None:
+            raise ValueError('backend numba needs the numba package')
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float64) or (engine == 'loop' and dtype != np.float64):
+            raise ValueError('dtype must be float32 or float64 (float64 only for the loop engine)')
+        self.engine = engine
+        self.op_cache = op_cache
+        self.fuse_steps = bool(fuse_steps)
+        self.prune_sd = None if prune_sd is None else float(prune_sd)
+        if exercise_band is not None and int(exercise_band) < 1:
+            raise ValueError('exercise_band must be at least 1')
+        self.exercise_band = None if exercise_band is None else int(exercise_band)
+        self.verify_band = bool(verify_band)
+        self.workers = int(workers)
+        # value surfaces, interpolation weights and operators are stored in dtype;
+        # grids, successor prices and the GH sums stay in float64
+        self.dtype = dtype
+        # compiled per-node kernel for the vector engine when numba is available
+        self.backend = ('numba' if _cont_kernel_jit is not None else 'numpy') if backend == 'auto' else backend
+        self._kernel_fn = _cont_kernel_jit
+        # pchip: monotone cubic Hermite in S and A; pchip_a: Hermite in A, linear in S
+        self.interp = interp
+        self._hq = None
+        # memory-mapped store of every V_n slice and exercise mask (surface_store.py)
+        self.store = None if surface_store is None else SurfaceStore(surface_store)
+        self._pool = ThreadPoolExecutor(self.workers) if self.workers > 1 else None
+        self._ops = {}
+        self._sw = {}
+        self.stats = {}
         self.Sg = np.array(S_grid, dtype=float)
         self.Ag = np.array(A_grid, dtype=float)
         self.NS, self.NA = len(self.Sg), len(self.Ag)
@@ -21,24 +127,512 @@ class DPSolverAsian:
         self.mu = (self.r - self.q - 0.5*self.sigma**2) * self.dt
         self.nu = self.sigma * np.sqrt(self.dt)
         self.x_gh, self.w_gh = gh_nodes_weights(self.K_gh)
+        if engine == 'fft':
+            h = np.diff(np.log(self.Sg))
+            if np.max(np.abs(h - h.mean())) > 1e-9 * h.mean():
+                raise ValueError('engine fft needs an S grid uniform in log S (grids.s_grid_logspace)')
+            self._h = h.mean()
+            self._kernels = {}
+        # k_prev[n] = number of monitoring dates in 1..n
+        mon = np.array([idx in self.monitor_schedule for idx in range(0, self.N+1)], dtype=int)
+        mon[0] = 0
+        self._k_prev = np.cumsum(mon)
     def payoff(self, S, A):
         return max(A - self.K, 0.0) if self.is_call else max(self.K - A, 0.0)
-    def _payoff_grid(self):
-        V = np.zeros((self.NS, self.NA), dtype=float)
-        for i in range(self.NS):
-            for j in range(self.NA):
-                V[i, j] = self.payoff(self.Sg[i], self.Ag[j])
-        return V
-    def price(self, S0: float, A0: float, return_frontier: bool = False):
+    def _payoff_grid(self, K=None, is_call=None):
+        K = self.K if K is None else K
+        is_call = self.is_call if is_call is None else is_call
+        A = np.broadcast_to(self.Ag, (self.NS, self.NA))
+        return (np.maximum(A - K, 0.0) if is_call else np.maximum(K - A, 0.0)).astype(self.dtype)
+    def _s_weights(self, L=1):
+        # successor prices over L steps and their S-interpolation weights are step independent
+        if L not in self._sw:
+            Sp = self.Sg[:, None] * np.exp(self.mu * L + self.nu * np.sqrt(L) * (np.sqrt(2.0) * self.x_gh))[None, :]
+            i0, i1, alpha = linear_weights(self.Sg, Sp)
+            self._sw[L] = (Sp, (i0, i1, alpha.astype(self.dtype)))
+        return self._sw[L]
+    def _a_weights(self, Spm, k_prev, monitored, ci=None):
+        Ag = self.Ag[None, :] if ci is None else self.Ag[ci]
+        if monitored:
+            j0, j1, beta = linear_weights(self.Ag, (k_prev * Ag + Spm) / (k_prev + 1))
+            return j0, j1, beta.astype(self.dtype)
+        shape = np.broadcast_shapes(np.shape(Spm), np.shape(Ag))
+        jj = np.broadcast_to(np.arange(self.NA)[None, :] if ci is None else ci, shape)
+        return jj, jj, np.zeros(shape, dtype=self.dtype)
+    def _plan(self, exercise_dates=None):
+        # (n, L) transitions from step n to n+L; with fuse_steps, steps whose
+        # intermediate dates are neither monitored nor exercisable are merged
+        exercise_dates = self.exercise_schedule if exercise_dates is None else exercise_dates
+        if not self.fuse_steps:
+            return [(n, 1) for n in range(self.N)]
+        cuts = [0] + [t for t in range(1, self.N)
+                      if t in self.monitor_schedule or t in exercise_dates] + [self.N]
+        return [(a, b - a) for a, b in zip(cuts[:-1], cuts[1:])]
+    def _continuation(self, V_next, n, L=1, idx=None):
+        # V_next is (..., NS, NA); idx = (ri, ci): broadcastable row/column index
+        # arrays of the nodes to evaluate
+        if idx is None:
+            idx = (np.arange(self.NS)[:, None], np.arange(self.NA)[None, :])
+        if self.interp != 'linear':
+            self._hermite_data(V_next)
+        if self._pool is None:
+            return self._continuation_tile(V_next, n, L, idx)
+        # split the nodes into tiles evaluated on the thread pool; every node is computed
+        # by the same operations as in the single-threaded path, so results are identical.
+        # The fft engine convolves along S and is split over A columns instead of S rows.
+        ri, ci = idx
+        shape = np.broadcast_shapes(ri.shape, ci.shape)
+        ax = 1 if (self.engine == 'fft' and ci.shape[0] == 1) else 0
+        parts = [p for p in np.array_split(np.arange(shape[ax]), self.workers) if len(p)]
+        if ax == 1:
+            tiles = [(ri, ci[:, p]) for p in parts]
+        else:
+            tiles = [(ri[p] if ri.shape[0] > 1 else ri, ci[p] if ci.shape[0] > 1 else ci) for p in parts]
+        # fill the lazily built caches before the workers read them
+        if self.engine == 'sparse':
+            self._operator(self._k_prev[n] if (n+L) in self.monitor_schedule else None, L)
+        elif self.engine == 'fft':
+            self._kernel(L)
+        else:
+            self._s_weights(L)
+        out = list(self._pool.map(lambda t: self._continuation_tile(V_next, n, L, t), tiles))
+        return np.concatenate(out, axis=ax - 2)
+    def _continuation_tile(self, V_next, n, L, idx):
+        k_prev = self._k_prev[n]
+        monitored = (n+L) in self.monitor_schedule
+        ri, ci = idx
+        shape = np.broadcast_shapes(ri.shape, ci.shape)
+        lead = V_next.shape[:-2]
+        if self.engine == 'sparse':
+            k = k_prev if monitored else None
+            op = self._operator(k, L)
+            if shape[1] == self.NA and ri.shape[0] == shape[0] and shape[0] < self.NS \
+                    and np.array_equal(ri.ravel(), np.arange(ri.flat[0], ri.flat[0] + shape[0])):
+                # full-width block of rows (a thread tile): a cached row slice of the operator
+                key = (k, L, int(ri.flat[0]), shape[0])
+                if key not in self._ops:
+                    self._ops[key] = op[key[2] * self.NA:(key[2] + key[3]) * self.NA]
+                op = self._ops[key]
+            elif shape != (self.NS, self.NA):
+                op = op[np.broadcast_to(ri * self.NA + ci, shape).ravel()]
+            Vf = V_next.reshape(-1, self.NS * self.NA)
+            return (op @ Vf.T).T.reshape(lead + shape)
+        if self.engine == 'fft':
+            if shape == (self.NS, self.NA):
+                return self._continuation_fft(V_next, k_prev, monitored, L)
+            if ci.ndim == 2 and ci.shape[0] == 1:
+                # box: convolve only the selected A columns
+                cont = self._continuation_fft(V_next, k_prev, monitored, L, ci[0])
+                return cont[..., ri, np.arange(ci.shape[1])[None, :]]
+            return self._continuation_fft(V_next, k_prev, monitored, L)[..., ri, ci]
+        if self.interp != 'linear':
+            return self._continuation_hermite(V_next, n, L, ri, ci)
+        if self.backend == 'numba' and ri.shape[-1] == 1 and ci.shape[0] == 1:
+            return self._continuation_kernel(V_next, n, L, ri[:, 0], ci[0])
+        Sp, (i0, i1, alpha) = self._s_weights(L)
+        # payoffs on the trailing axis so that each gather fetches a contiguous vector
+        Vf = V_next.reshape(-1, self.NS * self.NA)
+        Vf = Vf[0] if Vf.shape[0] == 1 else np.ascontiguousarray(Vf.T)
+        acc = np.zeros(shape + Vf.shape[1:])
+        for m in range(self.K_gh):
+            aw = self._a_weights(Sp[ri, m], k_prev, monitored, ci)
+            acc += self.w_gh[m] * bilinear_apply_flat(Vf, self.NA, (i0[ri, m], i1[ri, m], alpha[ri, m]), aw)
+        cont = (np.exp(-self.r * self.dt * L) * acc / np.sqrt(np.pi)).astype(self.dtype, copy=False)
+        return (np.moveaxis(cont, -1, 0) if Vf.ndim > 1 else cont).reshape(lead + shape)
+    def _s_hermite(self, L):
+        # S weights of the Hermite schemes, once per L: 4 Hermite weights (pchip) or 2 linear ones
+        if ('h', L) not in self._sw:
+            Sp, (i0, i1, alpha) = self._s_weights(L)
+            if self.interp == 'pchip':
+                i0, i1, w = hermite_weights(self.Sg, Sp)
+                w = tuple(x.astype(self.dtype) for x in w)
+            else:
+                w = (1 - alpha, alpha)
+            self._sw[('h', L)] = (Sp, (i0, i1, w))
+        return self._sw[('h', L)]
+    def _hermite_data(self, V_next):
+        # flat (NS*NA, C[, P]) stack of V and its monotone slopes: channels V, dV/dA and,
+        # for pchip, dV/dS, d2V/dSdA; computed once per step (cached on the V_next object)
+        if self._hq is not None and self._hq[0] is V_next:
+            return self._hq[1]
+        V = V_next.reshape(-1, self.NS, self.NA)
+        dA = pchip_slopes(self.Ag, V, -1)
+        chans = [V, dA]
+        if self.interp == 'pchip':
+            chans += [pchip_slopes(self.Sg, V, -2), pchip_slopes(self.Sg, dA, -2)]
+        Q = np.stack(chans, axis=-1).reshape(V.shape[0], self.NS * self.NA, len(chans))
+        Qf = Q[0] if V.shape[0] == 1 else np.ascontiguousarray(Q.transpose(1, 2, 0))
+        self._hq = (V_next, Qf)
+        return Qf
+    def _continuation_hermite(self, V_next, n, L, ri, ci):
+        k_prev = self._k_prev[n]
+        monitored = (n+L) in self.monitor_schedule
+        Qf = self._hermite_data(V_next)
+        Sp, (i0, i1, ws) = self._s_hermite(L)
+        shape = np.broadcast_shapes(ri.shape, ci.shape)
+        acc = np.zeros(shape + Qf.shape[2:])
+        for m in range(self.K_gh):
+            sw = (i0[ri, m], i1[ri, m], tuple(w[ri, m] for w in ws))
+            if monitored:
+                j0, j1, wa = hermite_weights(self.Ag, (k_prev * self.Ag[ci] + Sp[ri, m]) / (k_prev + 1))
+                aw = (j0, j1, tuple(w.astype(self.dtype) for w in wa))
+            else:
+                aw = (np.broadcast_to(ci, shape), None, (1.0, 0.0))
+            acc += self.w_gh[m] * hermite_apply_flat(Qf, self.NA, sw, aw)
+        cont = (np.exp(-self.r * self.dt * L) * acc / np.sqrt(np.pi)).astype(self.dtype, copy=False)
+        return (np.moveaxis(cont, -1, 0) if Qf.ndim > 2 else cont).reshape(V_next.shape[:-2] + shape)
+    def _continuation_kernel(self, V_next, n, L, rows, cols):
+        Sp, (i0, i1, alpha) = self._s_weights(L)
+        lead = V_next.shape[:-2]
+        V = np.ascontiguousarray(V_next.reshape(-1, self.NS, self.NA))
+        out = np.zeros((V.shape[0], len(rows), len(cols)))
+        self._kernel_fn(V, self.Sg, self.Ag, i0, i1, alpha, Sp, self.w_gh, np.ascontiguousarray(rows),
+                        np.ascontiguousarray(cols), int(self._k_prev[n]), (n+L) in self.monitor_schedule, out,
+                        np.zeros(1, dtype=self.dtype))
+        cont = (np.exp(-self.r * self.dt * L) * out / np.sqrt(np.pi)).astype(self.dtype, copy=False)
+        return cont.reshape(lead + out.shape[1:])
+    def _evaluate(self, V_next, n, L, need, overhead=1024):
+        # continuation on boxes covering the flagged nodes; all other nodes keep the
+        # value of the next step. Each row's flagged columns are bracketed by [lo, hi];
+        # consecutive rows are merged into one box until the nodes the box computes
+        # needlessly exceed overhead, the fixed cost of a box in node evaluations
+        cont = V_next.copy()
+        rows = np.nonzero(need.any(axis=1))[0]
+        if len(rows) == 0:
+            return cont, 0
+        lo = np.argmax(need, axis=1)[rows]
+        hi = self.NA - 1 - np.argmax(need[:, ::-1], axis=1)[rows]
+        groups, a, R = [], 0, len(rows)
+        while a < R:
+            # the box grows row by row until its idle nodes exceed overhead or a row is skipped
+            k = np.arange(1, R - a + 1)
+            width = np.maximum.accumulate(hi[a:]) - np.minimum.accumulate(lo[a:]) + 1
+            idle = k * width - np.cumsum(hi[a:] - lo[a:] + 1)
+            stop = (idle > overhead) | (rows[a:] - rows[a] != k - 1)
+            b = a + int(np.argmax(stop)) if stop.any() else R
+            groups.append((a, b))
+            a = b
+        count = 0
+        for a, b in groups:
+            r0, r1, c0, c1 = rows[a], rows[b-1] + 1, lo[a:b].min(), hi[a:b].max() + 1
+            cont[..., r0:r1, c0:c1] = self._continuation(V_next, n, L, np.ix_(np.arange(r0, r1), np.arange(c0, c1)))
+            count += (r1 - r0) * (c1 - c0)
+        return cont, count
+    def _reachable_boxes(self, S0, A0, plan, pad0=0):
+        # per step n, the (rows, cols) index box of nodes reachable from (S0, A0)
+        # within prune_sd standard deviations, widened to the bracketing nodes
+        # (and by pad0 nodes at step 0, for the finite-difference greeks)
+        c = self.prune_sd
+        a = self.r - self.q - 0.5 * self.sigma**2
+        mon_t = np.array([t for t in range(1, self.N+1) if t in self.monitor_schedule]) * self.dt
+        def bracket(grid, lo, hi):
+            i = max(np.searchsorted(grid, lo, side='right') - 1, 0)
+            j = min(np.searchsorted(grid, hi, side='left'), len(grid) - 1)
+            return np.arange(i, max(i, j) + 1)
+        boxes = {}
+        for n, _ in plan:
+            t = n * self.dt
+            rows = bracket(self.Sg, S0 * np.exp(a * t - c * self.sigma * np.sqrt(t)),
+                           S0 * np.exp(a * t + c * self.sigma * np.sqrt(t)))
+            k = self._k_prev[n]
+            if k == 0:
+                cols = bracket(self.Ag, A0, A0)
+            else:
+                # log-sd of the geometric average of the first k monitored prices
+                tm = mon_t[:k]
+                sd = self.sigma * np.sqrt(np.minimum.outer(tm, tm).sum()) / k
+                cols = bracket(self.Ag, S0 * np.exp(a * tm.mean() - c * sd),
+                               S0 * np.exp((self.r - self.q) * t + c * sd))
+            if n == 0 and pad0:
+                rows = np.arange(max(rows[0] - pad0, 0), min(rows[-1] + pad0, self.NS - 1) + 1)
+                cols = np.arange(max(cols[0] - pad0, 0), min(cols[-1] + pad0, self.NA - 1) + 1)
+            boxes[n] = np.ix_(rows, cols)
+        return boxes
+    def _kernel(self, L):
+        # p[d] = E[hat((X - d*h)/h)], X ~ N(mu*L, nu^2*L): exact expectation of the
+        # piecewise-linear interpolant in log S, truncated at 10 standard deviations
+        if L not in self._kernels:
+            m, v, h = self.mu * L, self.nu * np.sqrt(L), self._h
+            D = int(np.ceil((abs(m) + 10.0 * v) / h)) + 1
+            x = np.arange(-D - 1, D + 2) * h
+            z = (m - x) / v
+            C = (m - x) * ndtr(z) + v * np.exp(-0.5 * z * z) / np.sqrt(2.0 * np.pi)
+            self._kernels[L] = (D, ((C[:-2] - 2.0 * C[1:-1] + C[2:]) / h).astype(self.dtype))
+        return self._kernels[L]
+    def _continuation_fft(self, V_next, k_prev, monitored, L, cols=None):
+        # A-update on the S nodes, then the S-expectation as one convolution along S
+        cols = np.arange(self.NA) if cols is None else cols
+        if monitored:
+            Sn = self.Sg[:, None]
+            j0, j1, beta = linear_weights(self.Ag, (k_prev * self.Ag[None, cols] + Sn) / (k_prev + 1))
+            beta = beta.astype(self.dtype)
+            ii = np.arange(self.NS)[:, None]
+            W = (1 - beta) * V_next[..., ii, j0] + beta * V_next[..., ii, j1]
+        else:
+            W = V_next[..., :, cols]
+        D, p = self._kernel(L)
+        lead = [(0, 0)] * (W.ndim - 2)
+        Wpad = np.pad(W, lead + [(D, D), (0, 0)], mode='edge')
+        kern = p[::-1].reshape((1,) * (W.ndim - 2) + (-1, 1))
+        cont = fftconvolve(Wpad, kern, mode='valid', axes=-2)
+        return (np.exp(-self.r * self.dt * L) * cont).astype(self.dtype, copy=False)
+    def _operator_key(self, k, L):
+        h = hashlib.sha1()
+        h.update(self.Sg.tobytes()); h.update(self.Ag.tobytes())
+        h.update(repr((self.r, self.q, self.sigma, self.dt, L, self.K_gh, k, self.dtype.str)).encode())
+        return h.hexdigest()
+    def _operator(self, k, L=1):
+        # k is the monitoring count of the step, None for an unmonitored step
+        if (k, L) in self._ops:
+            return self._ops[(k, L)]
+        path = None
+        if self.op_cache is not None:
+            path = os.path.join(self.op_cache, f'op_{self._operator_key(k, L)}.npz')
+            if os.path.exists(path):
+                self._ops[(k, L)] = sp.load_npz(path).tocsr()
+                return self._ops[(k, L)]
+        Sp, (i0, i1, alpha) = self._s_weights(L)
+        rows = np.arange(self.NS * self.NA).reshape(self.NS, self.NA)
+        scale = np.exp(-self.r * self.dt * L) / np.sqrt(np.pi)
+        R, C, W = [], [], []
+        for m in range(self.K_gh):
+            j0, j1, beta = self._a_weights(Sp[:, m:m+1], k, k is not None)
+            a = alpha[:, m:m+1]; ia = i0[:, m:m+1]; ib = i1[:, m:m+1]
+            wm = scale * self.w_gh[m]
+            for ii, jj, ww in ((ia, j0, (1-a)*(1-beta)), (ib, j0, a*(1-beta)),
+                               (ia, j1, (1-a)*beta), (ib, j1, a*beta)):
+                R.append(rows.ravel())
+                C.append(np.broadcast_to(ii * self.NA + jj, rows.shape).ravel())
+                W.append(np.broadcast_to(wm * ww, rows.shape).ravel())
+        size = self.NS * self.NA
+        op = sp.csr_matrix((np.concatenate(W), (np.concatenate(R), np.concatenate(C))), shape=(size, size))
+        op.data = op.data.astype(self.dtype)
+        op.eliminate_zeros()
+        if path is not None:
+            os.makedirs(self.op_cache, exist_ok=True)
+            sp.save_npz(path, op, compressed=False)
+        self._ops[(k, L)] = op
+        return op
+    def price(self, S0: float, A0: float, return_frontier: bool = False, return_greeks: bool = False,
+              bump_sigma: float = 1e-3, bump_r: float = 1e-4):
+        if self.engine == 'loop':
+            if return_greeks:
+                raise ValueError('return_greeks is not supported by the loop engine')
+            return self._price_loop(S0, A0, return_frontier)
+        writer = None
+        if self.store is not None:
+            key = surface_key(self)
+            if self.store.has(key) and not return_greeks:
+                # stored solve: a lookup on the t=0 slice
+                st = self.store.open(key)
+                self.stats = {'steps': len(st.steps) - 1, 'fused_steps': self.N - len(st.steps) + 1,
+                              'store_hit': True}
+                return st.price(0, S0, A0), (st.frontier() if return_frontier else None)
+            writer = self.store.writer(self)
+        prices, frontiers = self._backward(S0, A0, [(self.K, self.is_call, self.exercise_schedule)],
+                                           return_frontier, keep_surfaces=return_greeks, writer=writer)
+        if writer is not None:
+            writer.close()
+            self.stats['store_hit'] = False
+        frontier = frontiers[0] if return_frontier else None
+        if return_greeks:
+            return prices[0], frontier, self._greeks(S0, A0, prices[0], bump_sigma, bump_r)
+        return prices[0], frontier
+    def _greeks(self, S0, A0, price0, bump_sigma, bump_r):
+        """Greeks of the last solve from its surfaces plus one batched bump run.
+
+        delta, gamma and dV/dA differentiate the t=0 surface at (S0, A0); dV/dA is zero
+        for a fresh trade because A0 has no weight before the first monitoring date.
+        theta compares with the first transition's surface at (S0, A1), A1 being the
+        average after that date's fixing, per unit of time. vega and rho are forward
+        differences from one scenario-batched run (base, sigma and r bumped) on this
+        solver's grids, so the discretisation error is shared between the bumps.
+        """
+        V0, V1, n1 = self._surfaces
+        dS, dSS, dA = surface_derivatives(V0.astype(np.float64), self.Sg, self.Ag, S0, A0)
+        t1 = n1 * self.dt
+        A1 = S0 if n1 in self.monitor_schedule else A0
+        theta = (float(bilinear(V1.astype(np.float64), self.Sg, self.Ag, S0, A1)) - price0) / t1
+        sc = DPSolverAsianScenarios(S0, self.T, self.N, r=[self.r, self.r, self.r + bump_r], q=self.q,
+                                    sigma=[self.sigma, self.sigma + bump_sigma, self.sigma],
+                                    K_gh=self.K_gh, monitor_schedule=sorted(self.monitor_schedule),
+                                    S_grid=self.Sg, A_grid=self.Ag, fuse_steps=self.fuse_steps)
+        p = sc.price(self.K, self.is_call, sorted(self.exercise_schedule), A0=A0)
+        return {'delta': dS, 'gamma': dSS, 'dV_dA': dA, 'theta': theta,
+                'vega': float(p[1] - p[0]) / bump_sigma, 'rho': float(p[2] - p[0]) / bump_r}
+    def price_batch(self, S0: float, A0: float, payoffs, return_frontier: bool = False):
+        """Price several payoffs on the same transition in one backward pass.
+
+        payoffs: sequence of (strike, is_call, exercise_schedule) tuples or dicts with
+        keys K, is_call, exercise_schedule. Returns (prices array, per-payoff lists of
+        ExerciseFrontier or None).
+        """
+        if self.engine == 'loop':
+            raise ValueError('price_batch is not supported by the loop engine')
+        specs = []
+        for p in payoffs:
+            if isinstance(p, dict):
+                p = (p['K'], p['is_call'], p.get('exercise_schedule'))
+            K, is_call, ex = p
+            specs.append((float(K), bool(is_call), set() if ex is None else set(ex)))
+        prices, frontiers = self._backward(S0, A0, specs, return_frontier)
+        return np.array(prices), (frontiers if return_frontier else None)
+    def _backward(self, S0, A0, specs, return_frontier, keep_surfaces=False, writer=None):
+        # V[b, i, j] for the payoffs specs[b] = (K, is_call, exercise dates)
+        if return_frontier and self.prune_sd is not None:
+            # outside the reachable box cont is the next step's value, not a continuation
+            raise ValueError('return_frontier needs full surfaces: not with prune_sd')
+        B = len(specs)
+        schedules = [e for _, _, e in specs]
+        ex = np.stack([self._payoff_grid(K, c) for K, c, _ in specs])
+        V_next = ex
+        plan = self._plan(set().union(*schedules))
+        self.stats = {'steps': len(plan), 'fused_steps': self.N - len(plan)}
+        boxes = self._reachable_boxes(S0, A0, plan, pad0=2 if keep_surfaces else 0) \
+            if self.prune_sd is not None else None
+        evaluated = 0; deep_total = 0
+        band_err = 0.0; band_mismatch = 0; band_redo = 0
+        prev_masks = [None] * B
+        frontiers = [[] for _ in range(B)]
+        if writer is not None:
+            writer.write(self.N, V_next[0])
+        for n, L in reversed(plan):
+            if keep_surfaces and n == 0:
+                # the surface after the first transition, for theta
+                self._surfaces = (None, V_next[0], L)
+            exercising = [b for b in range(B) if n in schedules[b]]
+            deep = None
+            if self.exercise_band is not None and exercising:
+                # nodes more than m nodes inside the next step's exercise region are
+                # candidates for the payoff. On the (S, A) grid the region is not nested
+                # across steps (A is an average over one more fixing at n+1), and the
+                # boundary moves by up to about sigma*sqrt(dt) per step, which can be many
+                # nodes on a fine grid or a coarse schedule. The candidates are therefore
+                # checked on their edge below and the step is solved in full if the
+                # boundary has moved into them
+                m = self.exercise_band
+                deep = np.zeros((B, self.NS, self.NA), dtype=bool)
+                for b in exercising:
+                    if prev_masks[b] is not None:
+                        deep[b] = _erode(prev_masks[b] & (ex[b] > 0), m)
+                if not deep.any():
+                    deep = None
+            inbox = None
+            if boxes is not None:
+                inbox = np.zeros((self.NS, self.NA), dtype=bool)
+                inbox[boxes[n]] = True
+            # a sparse mat-vec or an S convolution costs about as much for a subset of the
+            # nodes as for all of them: those engines compute the continuation in full
+            # (or on the reachable box) and only assign the payoff on the deep nodes
+            if deep is not None and self.engine == 'vector':
+                # continuation is shared, so a node is skipped only if deep for every payoff
+                skip = deep.all(axis=0)
+                # the A-edge nodes of each payoff's deep region (box edges included) are
+                # evaluated as well: the exercise region is monotone in A, so a boundary that
+                # moved into the deep nodes of a row shows at the row's edge node
+                edge = np.zeros((self.NS, self.NA), dtype=bool)
+                for b in exercising:
+                    d = deep[b] if inbox is None else deep[b] & inbox
+                    inner = d.copy()
+                    inner[:, 1:] &= d[:, :-1]; inner[:, :-1] &= d[:, 1:]
+                    edge |= d & ~inner
+                    full_row = d.all(axis=1)
+                    edge[full_row, 0] = edge[full_row, -1] = True
+                need = ~skip | edge
+                if inbox is not None:
+                    need &= inbox
+                cont, cnt = self._evaluate(V_next, n, L, need)
+                evaluated += cnt
+                if any(np.any(edge & deep[b] & (ex[b] < cont[b])) for b in exercising):
+                    # the boundary moved by more than the margin: the step is solved in full
+                    deep = None; band_redo += 1
+                else:
+                    deep_total += int((skip & ~edge).sum())
+            if deep is None or self.engine != 'vector':
+                if boxes is None:
+                    cont = self._continuation(V_next, n, L)
+                    evaluated += self.NS * self.NA
+                else:
+                    cont = V_next.copy()
+                    cont[(Ellipsis,) + boxes[n]] = self._continuation(V_next, n, L, boxes[n])
+                    evaluated += len(boxes[n][0]) * boxes[n][1].shape[1]
+                if deep is not None:
+                    # every node is evaluated, so the deep nodes are checked directly
+                    bad = [deep[b] & (ex[b] < cont[b]) for b in exercising]
+                    if any(np.any(x if inbox is None else x & inbox) for x in bad):
+                        deep = None
+                    else:
+                        deep_total += int(deep.all(axis=0).sum())
+            full = None
+            if deep is not None and self.verify_band:
+                full = self._continuation(V_next, n, L)
+                if boxes is not None:
+                    # compared on the reachable box, the only nodes the solve evaluates
+                    inner = full[(Ellipsis,) + boxes[n]]
+                    full = cont.copy()
+                    full[(Ellipsis,) + boxes[n]] = inner
+            V_now = cont
+            for b in exercising:
+                Vb = np.where(ex[b] > cont[b], ex[b], cont[b])
+                mask = ex[b] >= cont[b]
+                if deep is not None:
+                    np.copyto(Vb, ex[b], where=deep[b]); mask |= deep[b]
+                    if full is not None:
+                        band_err = max(band_err, float(np.max(np.abs(Vb - np.where(ex[b] > full[b], ex[b], full[b])))))
+                        band_mismatch += int(np.sum((mask != (ex[b] >= full[b])) & (ex[b] > 0)))
+                if return_frontier:
+                    # before V_now[b] (= cont[b]) is overwritten
+                    frontiers[b].append(ExerciseFrontier.from_gap(self.Sg, self.Ag, ex[b] - cont[b], mask))
+                V_now[b] = Vb
+                prev_masks[b] = mask
+            for b in range(B):
+                if b not in exercising:
+                    prev_masks[b] = None
+            V_next = V_now
+            if writer is not None:
+                writer.write(n, V_next[0], prev_masks[0] if 0 in exercising else None)
+        self.stats['pruned_fraction'] = float(1.0 - evaluated / (len(plan) * self.NS * self.NA))
+        if self.exercise_band is not None:
+            self.stats['deep_exercise_fraction'] = deep_total / (len(plan) * self.NS * self.NA)
+            self.stats['band_redo_steps'] = band_redo
+            if self.verify_band:
+                self.stats['band_max_error'] = band_err
+                self.stats['band_mask_mismatch'] = band_mismatch
+        if keep_surfaces:
+            self._surfaces = (V_next[0],) + self._surfaces[1:]
+        prices = [float(bilinear(V_next[b].astype(np.float64), self.Sg, self.Ag, S0, A0)) for b in range(B)]
+        return prices, [f[::-1] for f in frontiers]
+    def check_precision(self, S0: float, A0: float):
+        """Price in this solver's dtype and in float64 on the same inputs.
+
+        Returns a dict with both prices and their absolute and relative difference.
+        """
+        price, _ = self.price(S0, A0)
+        saved = (self.dtype, self._sw, self._ops, getattr(self, '_kernels', None), self.stats)
+        self.dtype, self._sw, self._ops, self.stats = np.dtype(np.float64), {}, {}, {}
+        if saved[3] is not None:
+            self._kernels = {}
+        try:
+            price64, _ = self.price(S0, A0)
+        finally:
+            self.dtype, self._sw, self._ops, kernels, self.stats = saved
+            if kernels is not None:
+                self._kernels = kernels
+        diff = abs(price - price64)
+        return {'dtype': self.dtype.name, 'price': price, 'price_float64': price64,
+                'abs_diff': diff, 'rel_diff': diff / abs(price64) if price64 != 0 else float('inf')}
+    def _price_loop(self, S0: float, A0: float, return_frontier: bool = False):
+        self.stats = {'steps': self.N, 'fused_steps': 0, 'pruned_fraction': 0.0}
         disc = np.exp(-self.r * self.dt)
         V_next = self._payoff_grid()
         frontier_masks = []
         for n in range(self.N-1, -1, -1):
-            k_prev = sum(1 for idx in range(1, n+1) if idx in self.monitor_schedule)
+            k_prev = self._k_prev[n]
             V_now = np.empty_like(V_next)
             Zk = np.sqrt(2.0) * self.x_gh
             drift = self.mu; vol = self.nu
             exercise_mask = np.zeros_like(V_now, dtype=bool) if (n in self.exercise_schedule) else None
+            gap = np.zeros_like(V_now) if exercise_mask is not None else None
             for i in range(self.NS):
                 Si = self.Sg[i]
                 for j in range(self.NA):
@@ -60,11 +654,12 @@ class DPSolverAsian:
                         V_now[i, j] = ex if ex > cont else cont
                         if exercise_mask is not None:
                             exercise_mask[i, j] = (ex >= cont)
+                            gap[i, j] = ex - cont
                     else:
                         V_now[i, j] = cont
             V_next = V_now
             if exercise_mask is not None and return_frontier:
-                frontier_masks.append(exercise_mask)
+                frontier_masks.append(ExerciseFrontier.from_gap(self.Sg, self.Ag, gap, exercise_mask))
         price0 = bilinear(V_next, self.Sg, self.Ag, S0, A0)
         if return_frontier:
             return price0, frontier_masks[::-1]
@@ -0,0 +1,73 @@
+import numpy as np
+from typing import Optional, List
+from gh import gh_nodes_weights
+from dp_asian import DPSolverAsian
+
+class DPSolverAsianReduced:
+    """European fixed-strike Asian on the one-dimensional reduced state.
+
+    With y = (M*K - k*A) / (M*S) (remaining strike per monitoring date over spot)
+    the value factorises as V_n(S, A) = S * f_n(y) and
+
+        f_n(y) = exp(-r*dt) * E[exp(X) * f_{n+1}(y*exp(-X) - 1/M * 1{n+1 monitored})],
+
+    X ~ N((r-q-sigma^2/2)*dt, sigma^2*dt), f_N(y) = max(-y, 0) (call) or max(y, 0) (put).
+    Unmonitored stretches are merged into one step (exact in this state).
+    Schedules with exercise dates fall back to the 2D DPSolverAsian.
+    """
+    def __init__(self, S_grid, A_grid, T: float, N: int, r: float, q: float, sigma: float,
+                 K: float, is_call: bool, K_gh: int = 7,
+                 monitor_schedule: Optional[List[int]] = None,
+                 exercise_schedule: Optional[List[int]] = None,
+                 NX: int = 4001, x_width: float = 5.0, **solver_opts):
+        self.T = float(T); self.N = int(N)
+        self.dt = self.T / self.N
+        self.r = float(r); self.q = float(q); self.sigma = float(sigma)
+        self.K = float(K); self.is_call = bool(is_call)
+        self.K_gh = int(K_gh)
+        self.NX = int(NX); self.x_width = float(x_width)
+        self.monitor_schedule = set(range(1, self.N+1)) if monitor_schedule is None else set(monitor_schedule)
+        self.exercise_schedule = set() if exercise_schedule is None else set(exercise_schedule)
+        self.M = sum(1 for idx in range(1, self.N+1) if idx in self.monitor_schedule)
+        if self.M == 0:
+            raise ValueError('monitor_schedule has no dates in 1..N')
+        self.x_gh, self.w_gh = gh_nodes_weights(self.K_gh)
+        self.stats = {}
+        self._fallback = None
+        if self.exercise_schedule:
+            self._fallback = DPSolverAsian(S_grid, A_grid, T=T, N=N, r=r, q=q, sigma=sigma, K=K,
+                                           is_call=is_call, K_gh=K_gh, monitor_schedule=monitor_schedule,
+                                           exercise_schedule=exercise_schedule, **solver_opts)
+    def x_grid(self, y0: float):
+        y_hi = max(abs(y0), 0.25) * np.exp(self.x_width * self.sigma * np.sqrt(self.T))
+        return np.linspace(-0.25 * y_hi, y_hi, self.NX)
+    def payoff(self, y):
+        return np.maximum(-y, 0.0) if self.is_call else np.maximum(y, 0.0)
+    @staticmethod
+    def _interp(xg, f, x):
+        # linear interpolation, extrapolated linearly beyond the grid (the value is
+        # exactly linear for y <= 0 and asymptotically linear for large y)
+        idx = np.clip(np.searchsorted(xg, x) - 1, 0, len(xg) - 2)
+        t = (x - xg[idx]) / (xg[idx+1] - xg[idx])
+        return (1 - t) * f[idx] + t * f[idx+1]
+    def price(self, S0: float, A0: float, return_frontier: bool = False):
+        if self._fallback is not None:
+            out = self._fallback.price(S0, A0, return_frontier=return_frontier)
+            self.stats = self._fallback.stats
+            return out
+        k0 = 0  # no monitoring date precedes step 0
+        y0 = (self.M * self.K - k0 * A0) / (self.M * S0)
+        yg = self.x_grid(y0)
+        cuts = [0] + [t for t in range(1, self.N) if t in self.monitor_schedule] + [self.N]
+        f = self.payoff(yg)
+        Zk = np.sqrt(2.0) * self.x_gh
+        for a, b in zip(cuts[-2::-1], cuts[:0:-1]):
+            L = b - a
+            X = (self.r - self.q - 0.5*self.sigma**2) * self.dt * L + self.sigma * np.sqrt(self.dt * L) * Zk
+            shift = 1.0 / self.M if b in self.monitor_schedule else 0.0
+            yp = yg[:, None] * np.exp(-X)[None, :] - shift
+            fp = self._interp(yg, f, yp)
+            f = np.exp(-self.r * self.dt * L) * (fp * np.exp(X)[None, :]) @ self.w_gh / np.sqrt(np.pi)
+        self.stats = {'steps': len(cuts) - 1, 'fused_steps': self.N - len(cuts) + 1}
+        price0 = float(S0 * self._interp(yg, f, np.array(y0)))
+        return (price0, []) if return_frontier else (price0, None)
@@ -0,0 +1,134 @@
+import numpy as np
+from typing import Optional, List
+from gh import gh_nodes_weights
+from grids import s_grid_logspace, a_grid_linear
+from interp2d import bilinear, linear_weights
+
+class DPSolverAsianScenarios:
+    """Fixed-strike Asian DP under B (r, q, sigma) scenarios solved together.
+
+    r, q and sigma broadcast to a common shape (B,). Each scenario gets its own
+    s_grid_logspace / a_grid_linear grid unless S_grid/A_grid are given, in which
+    case all scenarios share them. The value surfaces are held as V[b, i, j, p]
+    (p = payoff) and every backward step is one gather over all scenarios.
+    """
+    def __init__(self, S0: float, T: float, N: int, r, q, sigma, K_gh: int = 7,
+                 monitor_schedule: Optional[List[int]] = None,
+                 NS: int = 121, NA: int = 101, kgrid: float = 3.0,
+                 S_grid=None, A_grid=None, fuse_steps: bool = False, row_block: int = 8):
+        self.r, self.q, self.sigma = (a.astype(float) for a in np.broadcast_arrays(
+            np.atleast_1d(r), np.atleast_1d(q), np.atleast_1d(sigma)))
+        self.B = len(self.r)
+        self.S0 = float(S0)
+        self.T = float(T); self.N = int(N)
+        self.dt = self.T / self.N
+        self.K_gh = int(K_gh)
+        self.fuse_steps = bool(fuse_steps)
+        self.row_block = int(row_block)
+        self.monitor_schedule = set(range(1, self.N+1)) if monitor_schedule is None else set(monitor_schedule)
+        if S_grid is None:
+            self.Sg = np.stack([s_grid_logspace(self.S0, s, self.T, k=kgrid, NS=NS) for s in self.sigma])
+        else:
+            self.Sg = np.broadcast_to(np.asarray(S_grid, dtype=float), (self.B, len(S_grid)))
+        if A_grid is None:
+            self.Ag = np.stack([a_grid_linear(Sg, NA=NA) for Sg in self.Sg])
+        else:
+            self.Ag = np.broadcast_to(np.asarray(A_grid, dtype=float), (self.B, len(A_grid)))
+        self.NS, self.NA = self.Sg.shape[1], self.Ag.shape[1]
+        # uniform A grids (a_grid_linear) get their interpolation weights in closed form
+        dA = np.diff(self.Ag, axis=1)
+        self._a_uniform = bool(np.all(np.abs(dA - dA[:, :1]) <= 1e-9 * np.abs(dA[:, :1])))
+        self.mu = (self.r - self.q - 0.5*self.sigma**2) * self.dt
+        self.nu = self.sigma * np.sqrt(self.dt)
+        self.x_gh, self.w_gh = gh_nodes_weights(self.K_gh)
+        mon = np.array([idx in self.monitor_schedule for idx in range(0, self.N+1)], dtype=int)
+        mon[0] = 0
+        self._k_prev = np.cumsum(mon)
+        self._sw = {}
+        self.stats = {}
+    def _s_weights(self, L=1):
+        # row indices are offset by b*NS so that they address the flat (B*NS*NA) surface
+        if L not in self._sw:
+            z = np.sqrt(2.0) * self.x_gh
+            Sp = self.Sg[:, :, None] * np.exp(self.mu[:, None, None] * L
+                                              + (self.nu[:, None, None] * np.sqrt(L)) * z[None, None, :])
+            i0, i1, alpha = zip(*(linear_weights(self.Sg[b], Sp[b]) for b in range(self.B)))
+            off = (np.arange(self.B) * self.NS)[:, None, None]
+            self._sw[L] = (Sp, (np.stack(i0) + off, np.stack(i1) + off, np.stack(alpha)))
+        return self._sw[L]
+    def _a_weights(self, k_prev, Spm):
+        # weights of the updated average (k*A_j + S')/(k+1) on the A grid
+        if not self._a_uniform:
+            Ap = (k_prev * self.Ag[:, None, :] + Spm) / (k_prev + 1)
+            return tuple(np.stack(w) for w in zip(*(linear_weights(self.Ag[b], Ap[b]) for b in range(self.B))))
+        # closed form on lo + j*dA: t = (k*A_j - (k+1)*lo)/((k+1)*dA) + S'/((k+1)*dA)
+        lo = self.Ag[:, :1]; scale = 1.0 / ((k_prev + 1) * (self.Ag[:, 1:2] - lo))
+        t = ((k_prev * self.Ag - (k_prev + 1) * lo) * scale)[:, None, :] + Spm * scale[:, :, None]
+        np.clip(t, 0, self.NA - 1, out=t)
+        j0 = np.minimum(t.astype(np.intp), self.NA - 2)
+        t -= j0
+        return j0, j0 + 1, t
+    def _plan(self, exercise_dates):
+        if not self.fuse_steps:
+            return [(n, 1) for n in range(self.N)]
+        cuts = [0] + [t for t in range(1, self.N)
+                      if t in self.monitor_schedule or t in exercise_dates] + [self.N]
+        return [(a, b - a) for a, b in zip(cuts[:-1], cuts[1:])]
+    def _continuation(self, V_next, n, L):
+        # V_next is (B, NS, NA, P); bilinear interpolation as nested lerps, in place
+        k_prev = self._k_prev[n]
+        monitored = (n+L) in self.monitor_schedule
+        Sp, (i0, i1, alpha) = self._s_weights(L)
+        P = V_next.shape[-1]
+        Vf = V_next.reshape(self.B * self.NS * self.NA, P)
+        Vf = Vf[:, 0] if P == 1 else Vf
+        ext = (lambda w: w) if P == 1 else (lambda w: w[..., None])
+        acc = np.zeros((self.B, self.NS, self.NA) + Vf.shape[1:])
+        jj = np.arange(self.NA)
+        # blocks of S rows across all scenarios keep the temporaries cache resident
+        for s0 in range(0, self.NS, self.row_block):
+            rows = slice(s0, s0 + self.row_block)
+            for m in range(self.K_gh):
+                r0 = i0[:, rows, m:m+1] * self.NA; r1 = i1[:, rows, m:m+1] * self.NA
+                a = ext(alpha[:, rows, m:m+1])
+                if monitored:
+                    j0, j1, beta = self._a_weights(k_prev, Sp[:, rows, m:m+1])
+                    beta = ext(beta)
+                    v0 = np.take(Vf, r0 + j0, axis=0); d = np.take(Vf, r0 + j1, axis=0)
+                    d -= v0; d *= beta; v0 += d
+                    v1 = np.take(Vf, r1 + j0, axis=0); d = np.take(Vf, r1 + j1, axis=0)
+                    d -= v1; d *= beta; v1 += d
+                else:
+                    v0 = np.take(Vf, r0 + jj, axis=0); v1 = np.take(Vf, r1 + jj, axis=0)
+                v1 -= v0; v1 *= a; v0 += v1
+                v0 *= self.w_gh[m]
+                acc[:, rows] += v0
+        acc *= (np.exp(-self.r * self.dt * L) / np.sqrt(np.pi)).reshape((-1,) + (1,) * (acc.ndim - 1))
+        return acc.reshape(V_next.shape)
+    def price_batch(self, payoffs, A0: Optional[float] = None):
+        """Prices (B, P) of the payoffs (K, is_call, exercise_schedule) under every scenario."""
+        A0 = self.S0 if A0 is None else float(A0)
+        specs = []
+        for p in payoffs:
+            if isinstance(p, dict):
+                p = (p['K'], p['is_call'], p.get('exercise_schedule'))
+            K, is_call, ex = p
+            specs.append((float(K), bool(is_call), set() if ex is None else set(ex)))
+        A = np.broadcast_to(self.Ag[:, None, :], (self.B, self.NS, self.NA))
+        ex = np.stack([np.maximum(A - K, 0.0) if c else np.maximum(K - A, 0.0) for K, c, _ in specs], axis=-1)
+        schedules = [e for _, _, e in specs]
+        plan = self._plan(set().union(*schedules))
+        self.stats = {'steps': len(plan), 'fused_steps': self.N - len(plan)}
+        V_next = ex
+        for n, L in reversed(plan):
+            V_now = self._continuation(V_next, n, L)
+            for p, sched in enumerate(schedules):
+                if n in sched:
+                    V_now[..., p] = np.where(ex[..., p] > V_now[..., p], ex[..., p], V_now[..., p])
+            V_next = V_now
+        return np.array([[bilinear(V_next[b, :, :, p], self.Sg[b], self.Ag[b], self.S0, A0)
+                          for p in range(len(specs))] for b in range(self.B)])
+    def price(self, K: float, is_call: bool, exercise_schedule: Optional[List[int]] = None,
+              A0: Optional[float] = None):
+        """Price array (B,) aligned with the scenario inputs."""
+        return self.price_batch([(K, is_call, exercise_schedule)], A0)[:, 0]
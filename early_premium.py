@@ -4,72 +4,105 @@ import matplotlib.pyplot as plt
 
 from grids import s_grid_logspace, a_grid_linear
 from dp_asian import DPSolverAsian
+from dp_reduced import DPSolverAsianReduced
+from dp_scenarios import DPSolverAsianScenarios
+from result_cache import default_cache, configure
+from sweep_executor import run_sweep
 
-def dp_price_euro(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid):
+def dp_price_euro(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, reduced=False, **solver_opts):
+    # reduced=True uses the 1D reduced-state solver (European only)
     Sg = s_grid_logspace(S0, sigma, T, k=kgrid, NS=NS)
     Ag = a_grid_linear(Sg, NA=NA)
-    solver = DPSolverAsian(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=False,
-                           K_gh=Kgh, monitor_schedule=list(range(1, N+1)), exercise_schedule=[])
-    price, _ = solver.price(S0=S0, A0=S0)
+    Solver = DPSolverAsianReduced if reduced else DPSolverAsian
+    solver = Solver(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=False,
+                           K_gh=Kgh, monitor_schedule=list(range(1, N+1)), exercise_schedule=[],
+                           **solver_opts)
+    price, _ = default_cache().solve(solver, "price", S0=S0, A0=S0)
     return price
 
-def dp_price_berm(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, freq=5):
+def dp_price_berm(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, freq=5, **solver_opts):
     # Bermudan put with exercise every `freq` steps; monitor every step.
     Sg = s_grid_logspace(S0, sigma, T, k=kgrid, NS=NS)
     Ag = a_grid_linear(Sg, NA=NA)
     monitor = list(range(1, N+1))
     exercise = [n for n in range(0, N) if (n % freq == 0 and n > 0)]
     solver = DPSolverAsian(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=False,
-                           K_gh=Kgh, monitor_schedule=monitor, exercise_schedule=exercise)
-    price, _ = solver.price(S0=S0, A0=S0)
+                           K_gh=Kgh, monitor_schedule=monitor, exercise_schedule=exercise,
+                           **solver_opts)
+    price, _ = default_cache().solve(solver, "price", S0=S0, A0=S0)
     return price
 
-def dp_price_amer(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid):
+def dp_price_amer(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, **solver_opts):
     # American put (exercise every step).
     Sg = s_grid_logspace(S0, sigma, T, k=kgrid, NS=NS)
     Ag = a_grid_linear(Sg, NA=NA)
     monitor = list(range(1, N+1))
     exercise = list(range(0, N))
     solver = DPSolverAsian(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=False,
-                           K_gh=Kgh, monitor_schedule=monitor, exercise_schedule=exercise)
-    price, _ = solver.price(S0=S0, A0=S0)
+                           K_gh=Kgh, monitor_schedule=monitor, exercise_schedule=exercise,
+                           **solver_opts)
+    price, _ = default_cache().solve(solver, "price", S0=S0, A0=S0)
     return price
 
-def sweep_premium_vs_M(S0,K,r,q,sigma,T,NS,NA,Kgh,kgrid,M_list,style,freq):
-    rows = []
-    for M in M_list:
-        euro = dp_price_euro(S0,K,r,q,sigma,T,NS,NA,M,Kgh,kgrid)
-        if style == "berm":
-            amer = dp_price_berm(S0,K,r,q,sigma,T,NS,NA,M,Kgh,kgrid,freq=freq)
-        else:
-            amer = dp_price_amer(S0,K,r,q,sigma,T,NS,NA,M,Kgh,kgrid)
-        rows.append({"M":M,"V_euro":euro,"V_amer":amer,"premium":amer-euro})
-        print(f"M={M}: Euro={euro:.6f}, {style}={amer:.6f}, Premium={amer-euro:.6f}")
-    return rows
-
-def sweep_premium_vs_sigma(S0,K,r,q,T,NS,NA,N,Kgh,kgrid,sigmas,style,freq):
-    rows = []
-    for s in sigmas:
-        euro = dp_price_euro(S0,K,r,q,s,T,NS,NA,N,Kgh,kgrid)
-        if style == "berm":
-            amer = dp_price_berm(S0,K,r,q,s,T,NS,NA,N,Kgh,kgrid,freq=freq)
-        else:
-            amer = dp_price_amer(S0,K,r,q,s,T,NS,NA,N,Kgh,kgrid)
-        rows.append({"sigma":s,"V_euro":euro,"V_amer":amer,"premium":amer-euro})
-        print(f"sigma={s:.3f}: Euro={euro:.6f}, {style}={amer:.6f}, Premium={amer-euro:.6f}")
-    return rows
-
-def sweep_premium_vs_K(S0,r,q,sigma,T,NS,NA,N,Kgh,kgrid,K_list,style,freq):
-    rows = []
-    for K in K_list:
-        euro = dp_price_euro(S0,K,r,q,sigma,T,NS,NA,N,Kgh,kgrid)
-        if style == "berm":
-            amer = dp_price_berm(S0,K,r,q,sigma,T,NS,NA,N,Kgh,kgrid,freq=freq)
-        else:
-            amer = dp_price_amer(S0,K,r,q,sigma,T,NS,NA,N,Kgh,kgrid)
-        rows.append({"K":K,"V_euro":euro,"V_amer":amer,"premium":amer-euro})
-        print(f"K={K:.2f}: Euro={euro:.6f}, {style}={amer:.6f}, Premium={amer-euro:.6f}")
-    return rows
+def dp_price_pair(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, style, freq=5, reduced=False, **solver_opts):
+    # European and Bermudan/American put on the same transition, one batched backward pass.
+    Sg = s_grid_logspace(S0, sigma, T, k=kgrid, NS=NS)
+    Ag = a_grid_linear(Sg, NA=NA)
+    monitor = list(range(1, N+1))
+    if style == "berm":
+        exercise = [n for n in range(0, N) if (n % freq == 0 and n > 0)]
+    else:
+        exercise = list(range(0, N))
+    solver = DPSolverAsian(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=False,
+                           K_gh=Kgh, monitor_schedule=monitor, exercise_schedule=exercise,
+                           **solver_opts)
+    if reduced or solver_opts.get("engine") == "loop":
+        # one price() per leg: the reduced solver is separate, the loop engine has no price_batch
+        euro = dp_price_euro(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, reduced=reduced, **solver_opts)
+        amer, _ = default_cache().solve(solver, "price", S0=S0, A0=S0)
+        return euro, amer
+    (euro, amer), _ = default_cache().solve(solver, "price_batch", S0, S0, [(K, False, []), (K, False, exercise)])
+    return euro, amer
+
+def premium_point(S0,K,r,q,sigma,T,NS,NA,N,Kgh,kgrid,style,freq=5,reduced=False,**solver_opts):
+    euro, amer = dp_price_pair(S0,K,r,q,sigma,T,NS,NA,N,Kgh,kgrid,style,freq=freq,reduced=reduced,**solver_opts)
+    return {"V_euro":euro,"V_amer":amer,"premium":amer-euro}
+
+def _run_premium(name, xs, make_kwargs, costs, style, jobs, out_csv):
+    # one premium_point per x through the sweep executor (process pool, streamed CSV, resume)
+    def report(row):
+        print(f"{name}={row[name]}: Euro={row['V_euro']:.6f}, {style}={row['V_amer']:.6f}, Premium={row['premium']:.6f}")
+    points = [({name: x}, make_kwargs(x)) for x in xs]
+    return run_sweep(premium_point, points, jobs=jobs, out_csv=out_csv, costs=costs, on_row=report)
+
+def sweep_premium_vs_M(S0,K,r,q,sigma,T,NS,NA,Kgh,kgrid,M_list,style,freq,reduced=False,jobs=1,out_csv=None,
+                       **solver_opts):
+    return _run_premium("M", M_list, lambda M: dict(S0=S0,K=K,r=r,q=q,sigma=sigma,T=T,NS=NS,NA=NA,N=M,Kgh=Kgh,
+                                                    kgrid=kgrid,style=style,freq=freq,reduced=reduced,**solver_opts),
+                        [NS*NA*M*Kgh for M in M_list], style, jobs, out_csv)
+
+def sweep_premium_vs_sigma(S0,K,r,q,T,NS,NA,N,Kgh,kgrid,sigmas,style,freq,reduced=False,jobs=1,out_csv=None,
+                           **solver_opts):
+    if not reduced and solver_opts.get("engine","vector") == "vector" and solver_opts.get("exercise_band") is None:
+        # all volatilities in one scenario-batched solve, each on its own grid
+        exercise = [n for n in range(0, N) if (n % freq == 0 and n > 0)] if style == "berm" else list(range(0, N))
+        solver = DPSolverAsianScenarios(S0, T, N, r, q, sigmas, K_gh=Kgh, NS=NS, NA=NA, kgrid=kgrid)
+        pairs = default_cache().solve(solver, "price_batch", [(K, False, []), (K, False, exercise)])
+        rows = []
+        for s, (euro, amer) in zip(sigmas, pairs):
+            rows.append({"sigma":s,"V_euro":euro,"V_amer":amer,"premium":amer-euro})
+            print(f"sigma={s:.3f}: Euro={euro:.6f}, {style}={amer:.6f}, Premium={amer-euro:.6f}")
+        return rows
+    return _run_premium("sigma", sigmas, lambda s: dict(S0=S0,K=K,r=r,q=q,sigma=s,T=T,NS=NS,NA=NA,N=N,Kgh=Kgh,
+                                                        kgrid=kgrid,style=style,freq=freq,reduced=reduced,
+                                                        **solver_opts),
+                        None, style, jobs, out_csv)
+
+def sweep_premium_vs_K(S0,r,q,sigma,T,NS,NA,N,Kgh,kgrid,K_list,style,freq,reduced=False,jobs=1,out_csv=None,
+                       **solver_opts):
+    return _run_premium("K", K_list, lambda K: dict(S0=S0,K=K,r=r,q=q,sigma=sigma,T=T,NS=NS,NA=NA,N=N,Kgh=Kgh,
+                                                    kgrid=kgrid,style=style,freq=freq,reduced=reduced,**solver_opts),
+                        None, style, jobs, out_csv)
 
 def save_csv(rows, path):
     if not rows: return
@@ -106,10 +139,17 @@ def main():
     ap.add_argument("--N", type=int, default=60)
     ap.add_argument("--Kgh", type=int, default=7)
     ap.add_argument("--kgrid", type=float, default=3.0)
+    ap.add_argument("--engine", choices=["vector","sparse","fft","loop"], default="vector")
+    ap.add_argument("--op_cache", type=str, default=None,
+                    help="Directory for cached sparse transition operators (engine=sparse)")
+    ap.add_argument("--exercise_band", type=int, default=None,
+                    help="Skip continuation deeper than this many nodes inside the last exercise region")
     # Style
     ap.add_argument("--style", choices=["berm","amer"], default="berm",
                     help="Compare Bermudan (default) or American to European")
     ap.add_argument("--freq", type=int, default=5, help="Bermudan exercise every `freq` steps")
+    ap.add_argument("--reduced", action="store_true",
+                    help="Price the European leg with the 1D reduced-state solver")
     # What to sweep
     ap.add_argument("--do_M", action="store_true")
     ap.add_argument("--do_sigma", action="store_true")
@@ -117,16 +157,31 @@ def main():
     ap.add_argument("--M_list", type=str, default="12,24,52")
     ap.add_argument("--sigmas", type=str, default="0.10,0.20,0.30,0.40,0.50")
     ap.add_argument("--K_list", type=str, default="70,85,100,115,130")
+    ap.add_argument("--cache_dir", type=str, default=".result_cache",
+                    help="On-disk tier of the result cache (shared by the study scripts)")
+    ap.add_argument("--no-cache", dest="no_cache", action="store_true", help="Recompute every result")
+    ap.add_argument("--jobs", type=int, default=1, help="Processes for the sweep points (largest grids first)")
+    ap.add_argument("--no-resume", dest="resume", action="store_false",
+                    help="Recompute points already present in the output CSVs")
     # Output
     ap.add_argument("--outdir", type=str, default="premium_figs")
     args = ap.parse_args()
 
     os.makedirs(args.outdir, exist_ok=True)
+    configure(directory=args.cache_dir, enabled=not args.no_cache)
+    solver_opts = dict(engine=args.engine, op_cache=args.op_cache, exercise_band=args.exercise_band)
+    if not args.resume:
+        for name in ("M", "sigma", "K"):
+            path = os.path.join(args.outdir, f"premium_vs_{name}.csv")
+            if os.path.exists(path):
+                os.remove(path)
 
     if args.do_M:
         Ms = [int(x) for x in args.M_list.split(",") if x.strip()]
         rows = sweep_premium_vs_M(args.S0,args.K,args.r,args.q,0.20,args.T,
-                                  args.NS,args.NA,args.Kgh,args.kgrid,Ms,args.style,args.freq)
+                                  args.NS,args.NA,args.Kgh,args.kgrid,Ms,args.style,args.freq,
+                                  reduced=args.reduced,jobs=args.jobs,
+                                  out_csv=os.path.join(args.outdir, "premium_vs_M.csv"),**solver_opts)
         save_csv(rows, os.path.join(args.outdir, "premium_vs_M.csv"))
         plot_premium_series([r["M"] for r in rows], [r["premium"] for r in rows],
                             "Monitoring dates M",
@@ -136,7 +191,9 @@ def main():
     if args.do_sigma:
         sigs = [float(x) for x in args.sigmas.split(",") if x.strip()]
         rows = sweep_premium_vs_sigma(args.S0,args.K,args.r,args.q,args.T,
-                                      args.NS,args.NA,args.N,args.Kgh,args.kgrid,sigs,args.style,args.freq)
+                                      args.NS,args.NA,args.N,args.Kgh,args.kgrid,sigs,args.style,args.freq,
+                                      reduced=args.reduced,jobs=args.jobs,
+                                      out_csv=os.path.join(args.outdir, "premium_vs_sigma.csv"),**solver_opts)
         save_csv(rows, os.path.join(args.outdir, "premium_vs_sigma.csv"))
         plot_premium_series([r["sigma"] for r in rows], [r["premium"] for r in rows],
                             "Volatility sigma",
@@ -146,12 +203,15 @@ def main():
     if args.do_K:
         Ks = [float(x) for x in args.K_list.split(",") if x.strip()]
         rows = sweep_premium_vs_K(args.S0,args.r,args.q,0.20,args.T,
-                                  args.NS,args.NA,args.N,args.Kgh,args.kgrid,Ks,args.style,args.freq)
+                                  args.NS,args.NA,args.N,args.Kgh,args.kgrid,Ks,args.style,args.freq,
+                                  reduced=args.reduced,jobs=args.jobs,
+                                  out_csv=os.path.join(args.outdir, "premium_vs_K.csv"),**solver_opts)
         save_csv(rows, os.path.join(args.outdir, "premium_vs_K.csv"))
         plot_premium_series([r["K"] for r in rows], [r["premium"] for r in rows],
                             "Strike K",
                             f"Premium vs K ({args.style})",
                             out_png=os.path.join(args.outdir, "premium_vs_K.png"))
+    print(default_cache().summary())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
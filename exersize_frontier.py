@@ -2,7 +2,6 @@
 import os
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.ndimage import gaussian_filter
 
 from grids import s_grid_logspace, a_grid_linear
 from dp_asian import DPSolverAsian
@@ -15,8 +14,9 @@ def _grid_edges_from_centers(centers):
     e[-1]   = c[-1] + (c[-1] - e[-2])
     return e
 
-def plot_frontier_clean(mask, Sg, Ag, title, savepath=None, smooth_sigma=0.0):
-    Z = mask.T.astype(float)  # (NA, NS)
+def plot_frontier_clean(frontier, title, savepath=None):
+    Sg, Ag = frontier.Sg, frontier.Ag
+    Z = frontier.to_mask().T.astype(float)  # (NA, NS)
 
     # Cell edges for pcolormesh
     S_edges = _grid_edges_from_centers(Sg)
@@ -27,12 +27,9 @@ def plot_frontier_clean(mask, Sg, Ag, title, savepath=None, smooth_sigma=0.0):
     # Heatmap with exact pixel edges; no interpolation
     pcm = ax.pcolormesh(S_edges, A_edges, Z, shading='flat')
 
-    # Optional light smoothing for a crisp single contour line
-    Zplot = Z if smooth_sigma <= 0 else gaussian_filter(Z, sigma=smooth_sigma)
-
-    # Contour on centers
-    Sg_mesh, Ag_mesh = np.meshgrid(Sg, Ag, indexing='xy')
-    CS = ax.contour(Sg_mesh, Ag_mesh, Zplot, levels=[0.5], linewidths=1.5)
+    # Boundary at sub-grid accuracy from the solver's ex - cont crossings
+    for S_b, A_b in frontier.curves():
+        ax.plot(S_b, A_b, color='k', linewidth=1.5)
 
     ax.set_xlabel("S")
     ax.set_ylabel("A")
@@ -68,10 +65,10 @@ def main():
                                K_gh=Kgh, monitor_schedule=monitor_sched,
                                exercise_schedule=exercise_sched)
 
-    price0, masks = solver_put.price(S0=S0, A0=S0, return_frontier=True)
+    price0, frontiers = solver_put.price(S0=S0, A0=S0, return_frontier=True)
     print(f"Bermudan Asian PUT price (S0=A0=100): {price0:.4f}")
 
-    # Map each returned mask to its exercise step index (chronological)
+    # Map each returned frontier to its exercise step index (chronological)
     ex_steps_sorted = sorted(exercise_sched)            # [5,10,15, ... ,55]
     step_to_idx = {step: i for i, step in enumerate(ex_steps_sorted)}
 
@@ -85,10 +82,9 @@ def main():
 
     for frac, step in zip(targets, target_steps):
         idx = step_to_idx[step]
-        mask = masks[idx]
         title = f"Exercise Frontier at t/T ≈ {frac:.2f} (step {step}/{N})"
         savepath = os.path.join(outdir, f"frontier_{int(frac*100):03d}")
-        plot_frontier_clean(mask, Sg, Ag, title, savepath=savepath, smooth_sigma=0.4)
+        plot_frontier_clean(frontiers[idx], title, savepath=savepath)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
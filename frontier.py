@@ -0,0 +1,92 @@
+import numpy as np
+
+class ExerciseFrontier:
+    """Exercise boundary of one date as sub-grid crossing points along one grid axis.
+
+    axis=1 stores A*(S): for every S row the A positions where the exercise decision
+    flips; axis=0 stores S*(A) per A column. start holds the decision at the first node
+    of each line, so the crossings determine the full NS x NA mask. Memory is
+    O(NS) (or O(NA)) per date instead of O(NS*NA).
+    """
+    def __init__(self, Sg, Ag, axis, start, indptr, cell, x):
+        self.Sg, self.Ag, self.axis = Sg, Ag, axis
+        self.start, self.indptr, self.cell, self.x = start, indptr, cell, x
+    @classmethod
+    def from_gap(cls, Sg, Ag, gap, mask=None, axis=None):
+        """Frontier of the mask gap >= 0 (gap = ex - cont), crossings by linear root finding.
+
+        mask overrides the sign of gap (e.g. nodes assigned the payoff by exercise_band);
+        where the two disagree the crossing is put at the cell midpoint. axis=None picks
+        the axis along which the boundary crosses each line fewest times (ties: A*(S)).
+        """
+        gap = np.asarray(gap)
+        mask = gap >= 0 if mask is None else np.asarray(mask, dtype=bool)
+        if axis is None:
+            na = (mask[:, 1:] != mask[:, :-1]).sum(axis=1)
+            ns = (mask[1:] != mask[:-1]).sum(axis=0)
+            axis = 1 if na.max(initial=0) <= ns.max(initial=0) else 0
+        grid = Ag if axis == 1 else Sg
+        m, g = (mask, gap) if axis == 1 else (mask.T, gap.T)
+        change = m[:, 1:] != m[:, :-1]
+        line, j = np.nonzero(change)
+        d0 = g[line, j].astype(np.float64); d1 = g[line, j + 1].astype(np.float64)
+        ok = ((d0 >= 0) == m[line, j]) & ((d1 >= 0) == m[line, j + 1]) & (d0 != d1)
+        t = np.where(ok, d0 / np.where(ok, d0 - d1, 1.0), 0.5)
+        # strictly inside the cell, so that node queries reproduce the mask
+        t = np.clip(t, 1e-6, 1 - 1e-6)
+        x = grid[j] + t * (grid[j + 1] - grid[j])
+        indptr = np.zeros(m.shape[0] + 1, dtype=np.int32)
+        np.cumsum(change.sum(axis=1), out=indptr[1:])
+        return cls(Sg, Ag, axis, m[:, 0].copy(), indptr, j.astype(np.int32), x)
+    @classmethod
+    def from_mask(cls, Sg, Ag, mask, axis=None):
+        """Frontier of a boolean mask alone; crossings at cell midpoints."""
+        mask = np.asarray(mask, dtype=bool)
+        return cls.from_gap(Sg, Ag, np.where(mask, 1.0, -1.0), mask, axis)
+    @property
+    def shape(self):
+        return (len(self.Sg), len(self.Ag))
+    @property
+    def nbytes(self):
+        return self.start.nbytes + self.indptr.nbytes + self.cell.nbytes + self.x.nbytes
+    def to_mask(self):
+        """Expand to the (NS, NA) boolean exercise mask."""
+        n_lines = len(self.start)
+        n_nodes = len(self.Ag) if self.axis == 1 else len(self.Sg)
+        flip = np.zeros((n_lines, n_nodes), dtype=np.int8)
+        flip[np.repeat(np.arange(n_lines), np.diff(self.indptr)), self.cell + 1] = 1
+        m = (np.cumsum(flip, axis=1) % 2).astype(bool) ^ self.start[:, None]
+        return m if self.axis == 1 else m.T
+    def __array__(self, dtype=None, copy=None):
+        m = self.to_mask()
+        return m if dtype is None else m.astype(dtype)
+    def boundary(self):
+        """All crossing points as (S, A) arrays, line by line."""
+        line = np.repeat(np.arange(len(self.start)), np.diff(self.indptr))
+        if self.axis == 1:
+            return self.Sg[line], self.x.copy()
+        return self.x.copy(), self.Ag[line]
+    def curves(self):
+        """Boundary branches as a list of (S, A) arrays: branch k joins the k-th crossing of every line."""
+        counts = np.diff(self.indptr)
+        out = []
+        for k in range(int(counts.max(initial=0))):
+            line = np.nonzero(counts > k)[0]
+            x = self.x[self.indptr[line] + k]
+            out.append((self.Sg[line], x) if self.axis == 1 else (x, self.Ag[line]))
+        return out
+    def exercise(self, S, A):
+        """Exercise decision at (S, A): nearest line, sub-grid position along it."""
+        S = np.asarray(S, dtype=float); A = np.asarray(A, dtype=float)
+        lines, along, c = (self.Sg, self.Ag, A) if self.axis == 1 else (self.Ag, self.Sg, S)
+        u = S if self.axis == 1 else A
+        i = np.clip(np.searchsorted(lines, u), 1, len(lines) - 1)
+        i = np.where(np.abs(lines[i-1] - u) <= np.abs(lines[i] - u), i - 1, i)
+        # one sorted key per line: offset each line's crossings by a multiple of the grid span
+        W = float(along[-1] - along[0]) + 1.0
+        line = np.repeat(np.arange(len(self.start)), np.diff(self.indptr))
+        key = line * W + (self.x - along[0])
+        q = i * W + np.clip(c, along[0], along[-1]) - along[0]
+        cnt = np.searchsorted(key, q, side='right') - self.indptr[i]
+        out = self.start[i] ^ (cnt % 2 == 1)
+        return bool(out) if out.ndim == 0 else out
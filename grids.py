@@ -8,3 +8,97 @@ def s_grid_logspace(S0: float, sigma: float, T: float, k: float = 3.0, NS: int =
     return np.exp(x)
 def a_grid_linear(S_grid, NA: int = 101):
     return np.linspace(float(S_grid.min()), float(S_grid.max()), NA)
+
+def _stretched(lo: float, hi: float, n: int, c: float, w: float):
+    # sinh stretching: uniform in u, x = c + w*sinh(u); spacing ~ w near c, growing away from it
+    u = np.linspace(np.arcsinh((lo - c) / w), np.arcsinh((hi - c) / w), n)
+    x = c + w * np.sinh(u)
+    x[0], x[-1] = lo, hi
+    return x
+def _snap(x, points):
+    # move the nearest interior node onto each point (strike kink, S0, A0) if order is kept
+    x = np.array(x, dtype=float)
+    for p in points:
+        i = int(np.clip(np.argmin(np.abs(x - p)), 1, len(x) - 2))
+        if x[i-1] < p < x[i+1]:
+            x[i] = p
+    return x
+def _density_grid(lo: float, hi: float, n: int, centers, w: float, frac: float = 0.5):
+    # nodes from the inverse CDF of a density mixing uniform (1 - frac) with
+    # Gaussian bumps of width w at the centers (frac)
+    xf = np.linspace(lo, hi, 64 * n)
+    dens = np.full(xf.shape, (1.0 - frac) / (hi - lo))
+    centers = np.asarray(centers, dtype=float)
+    centers = centers[(centers >= lo) & (centers <= hi)]
+    if len(centers):
+        h = xf[1] - xf[0]
+        hist = np.bincount(np.clip(np.rint((centers - lo) / h).astype(int), 0, len(xf) - 1), minlength=len(xf))
+        z = np.arange(-int(np.ceil(5 * w / h)), int(np.ceil(5 * w / h)) + 1) * h
+        bump = np.convolve(hist, np.exp(-0.5 * (z / w)**2), mode='same')
+        dens += frac * bump / (bump.sum() * h)
+    cdf = np.concatenate([[0.0], np.cumsum(0.5 * (dens[1:] + dens[:-1]) * np.diff(xf))])
+    x = np.interp(np.linspace(0.0, cdf[-1], n), cdf, xf)
+    x[0], x[-1] = lo, hi
+    return x
+def s_grid_sinh(S0: float, sigma: float, T: float, K: float = None, k: float = 3.0, NS: int = 121,
+                width: float = 0.3):
+    # same log-S range as s_grid_logspace, nodes concentrated around log K (S0 if K is None);
+    # width is the core spacing scale in units of sigma*sqrt(T)
+    rng = k * sigma * np.sqrt(T)
+    c = np.log(S0 if K is None else K)
+    x = _stretched(np.log(S0) - rng, np.log(S0) + rng, NS, c, width * sigma * np.sqrt(T))
+    return np.exp(_snap(x, [np.log(S0)]))
+def a_grid_sinh(S_grid, K: float, NA: int = 101, width: float = None, lo: float = None, hi: float = None):
+    # A range of a_grid_linear (or [lo, hi]), nodes concentrated around the strike, K on a node
+    lo = float(S_grid.min()) if lo is None else lo
+    hi = float(S_grid.max()) if hi is None else hi
+    width = 0.05 * (hi - lo) if width is None else width
+    return _snap(_stretched(lo, hi, NA, K, width), [K])
+def a_grid_narrow(S0: float, sigma: float, T: float, r: float = 0.0, q: float = 0.0, K: float = None,
+                  k: float = 3.0, NA: int = 101, width: float = None):
+    # A range of the running average rather than of S: the log-sd of the geometric
+    # average of k monitored prices is largest at maturity, sigma*sqrt(T/3), so one
+    # range covers every monitoring count. Extended to contain S0 (= A0) and K.
+    m = (r - q - 0.5 * sigma**2) * T / 2
+    sd = sigma * np.sqrt(T / 3)
+    lo = min(S0 * np.exp(m - k * sd), S0, S0 if K is None else K)
+    hi = max(S0 * np.exp((r - q) * T / 2 + k * sd), S0, S0 if K is None else K)
+    if width is None:
+        return _snap(np.linspace(lo, hi, NA), [S0] + ([] if K is None else [K]))
+    return _snap(_stretched(lo, hi, NA, S0 if K is None else K, width), [S0] + ([] if K is None else [K]))
+def frontier_grids(S_grid, A_grid, masks, NS: int, NA: int, K: float = None,
+                   width_s: float = None, width_a: float = None, frac: float = 0.7):
+    # S (log-spaced base) and A grids over the same ranges, with a fraction frac of the
+    # nodes clustered around the exercise boundary of a previous (coarse) solve;
+    # masks are its exercise-region masks on (S_grid, A_grid)
+    xs, ys = [], []
+    lS = np.log(S_grid)
+    for mask in masks:
+        m = np.asarray(mask, dtype=bool)
+        di, dj = np.nonzero(m[1:] != m[:-1]), np.nonzero(m[:, 1:] != m[:, :-1])
+        xs += [0.5 * (lS[di[0]] + lS[di[0] + 1]), lS[dj[0]]]
+        ys += [A_grid[di[1]], 0.5 * (A_grid[dj[1]] + A_grid[dj[1] + 1])]
+    xs = np.concatenate(xs) if xs else np.empty(0)
+    ys = np.concatenate(ys) if ys else np.empty(0)
+    if K is not None:
+        # the payoff kink carries as much weight as the whole boundary
+        xs = np.concatenate([xs, np.full(max(len(xs), 1), np.log(K))])
+        ys = np.concatenate([ys, np.full(max(len(ys), 1), K)])
+    width_s = (lS[-1] - lS[0]) / 24 if width_s is None else width_s
+    width_a = (A_grid[-1] - A_grid[0]) / 20 if width_a is None else width_a
+    Sg = np.exp(_density_grid(lS[0], lS[-1], NS, xs, width_s, frac))
+    Ag = _density_grid(float(A_grid[0]), float(A_grid[-1]), NA, ys, width_a, frac)
+    return Sg, (Ag if K is None else _snap(Ag, [K]))
+GRID_KINDS = ('uniform', 'sinh', 'narrow')
+def make_grids(kind: str, S0: float, sigma: float, T: float, NS: int, NA: int, K: float = None,
+               r: float = 0.0, q: float = 0.0, k: float = 3.0):
+    # (S_grid, A_grid) of one of GRID_KINDS; sinh/narrow concentrate nodes near the strike
+    if kind == 'uniform':
+        Sg = s_grid_logspace(S0, sigma, T, k=k, NS=NS)
+        return Sg, a_grid_linear(Sg, NA=NA)
+    Sg = s_grid_sinh(S0, sigma, T, K=K, k=k, NS=NS)
+    if kind == 'sinh':
+        return Sg, a_grid_sinh(Sg, S0 if K is None else K, NA=NA)
+    if kind == 'narrow':
+        return Sg, a_grid_narrow(S0, sigma, T, r=r, q=q, K=K, k=k, NA=NA, width=0.1 * S0)
+    raise ValueError(f'grid kind must be one of {GRID_KINDS}')
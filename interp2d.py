@@ -17,3 +17,106 @@ def bilinear(V, Sg, Ag, S, A):
     v00 = V[i0, j0]; v10 = V[i1, j0]
     v01 = V[i0, j1]; v11 = V[i1, j1]
     return (1-alpha)*(1-beta)*v00 + alpha*(1-beta)*v10 + (1-alpha)*beta*v01 + alpha*beta*v11
+
+def linear_weights(grid, x):
+    n = len(grid)
+    i1 = np.searchsorted(grid, x, side='left')
+    inside = (i1 > 0) & (i1 < n)
+    i1 = np.clip(i1, 0, n-1)
+    i0 = np.where(inside, i1 - 1, i1)
+    d = grid[i1] - grid[i0]
+    w = np.where(d != 0, (x - grid[i0]) / np.where(d != 0, d, 1), 0)
+    return i0, i1, w.astype(grid.dtype, copy=False)
+
+def bilinear_apply(V, sw, aw):
+    i0, i1, alpha = sw
+    j0, j1, beta = aw
+    return ((1-alpha)*(1-beta)*V[..., i0, j0] + alpha*(1-beta)*V[..., i1, j0]
+            + (1-alpha)*beta*V[..., i0, j1] + alpha*beta*V[..., i1, j1])
+
+def bilinear_apply_flat(Vf, NA, sw, aw):
+    # Vf is V reshaped to (NS*NA, ...); gathers with np.take on the flat node index
+    i0, i1, alpha = sw
+    j0, j1, beta = aw
+    if Vf.ndim > 1:
+        alpha = alpha[..., None]; beta = beta[..., None]
+    r0 = i0 * NA; r1 = i1 * NA
+    return ((1-alpha)*(1-beta)*np.take(Vf, r0 + j0, axis=0) + alpha*(1-beta)*np.take(Vf, r1 + j0, axis=0)
+            + (1-alpha)*beta*np.take(Vf, r0 + j1, axis=0) + alpha*beta*np.take(Vf, r1 + j1, axis=0))
+
+def bilinear_vec(V, Sg, Ag, S, A):
+    return bilinear_apply(V, linear_weights(Sg, S), linear_weights(Ag, A))
+
+def _pchip_end(h0, h1, m0, m1):
+    # one-sided three-point slope at an end point, limited to keep monotonicity
+    d = ((2*h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+    d = np.where(np.sign(d) != np.sign(m0), 0.0, d)
+    return np.where((np.sign(m0) != np.sign(m1)) & (np.abs(d) > 3*np.abs(m0)), 3*m0, d)
+
+def pchip_slopes(grid, V, axis=-1):
+    # Fritsch-Carlson monotone derivative estimates of V along axis (non-uniform grid)
+    V = np.moveaxis(V, axis, -1)
+    h = np.diff(grid)
+    m = np.diff(V, axis=-1) / h
+    d = np.zeros_like(V)
+    w1 = 2*h[1:] + h[:-1]; w2 = h[1:] + 2*h[:-1]
+    m0, m1 = m[..., :-1], m[..., 1:]
+    same = m0 * m1 > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d[..., 1:-1] = np.where(same, (w1 + w2) / (w1 / np.where(same, m0, 1) + w2 / np.where(same, m1, 1)), 0.0)
+    d[..., 0] = _pchip_end(h[0], h[1], m[..., 0], m[..., 1])
+    d[..., -1] = _pchip_end(h[-1], h[-2], m[..., -1], m[..., -2])
+    return np.moveaxis(d, -1, axis)
+
+def hermite_weights(grid, x):
+    # cubic Hermite basis on the bracketing cell: (i0, i1, (H0, H1, G0*h, G1*h)) so that
+    # f(x) = H0*f0 + H1*f1 + G0*h*f0' + G1*h*f1'; clamped like linear_weights
+    i0, i1, t = linear_weights(grid, x)
+    h = grid[i1] - grid[i0]
+    s = 1 - t
+    return i0, i1, (s*s*(1 + 2*t), t*t*(3 - 2*t), (t*s*s*h).astype(t.dtype, copy=False),
+                    (-t*t*s*h).astype(t.dtype, copy=False))
+
+def hermite_apply_flat(Qf, NA, sw, aw):
+    # Qf is (NS*NA, C) or (NS*NA, C, P) with channels c = 2*ks + ka holding
+    # d^ks/dS^ks d^ka/dA^ka V; sw/aw are (i0, i1, weights) with 2 weights (linear)
+    # or 4 (Hermite) per axis, ordered (value@0, value@1, slope@0, slope@1).
+    # j1 = None evaluates on the A nodes j0 (weights (1, 0))
+    i0, i1, ws = sw
+    j0, j1, wa = aw
+    nS, nA = len(ws) // 2, len(wa) // 2
+    out = 0.0
+    for i, si in ((i0, 0), (i1, 1)):
+        for j, sj in (((j0, 0),) if j1 is None else ((j0, 0), (j1, 1))):
+            c = np.take(Qf, i * NA + j, axis=0)
+            if Qf.ndim > 2:
+                c = np.moveaxis(c, -2, 0)
+                for ks in range(nS):
+                    for ka in range(nA):
+                        out = out + np.asarray(ws[2*ks + si] * wa[2*ka + sj])[..., None] * c[2*ks + ka]
+            else:
+                for ks in range(nS):
+                    for ka in range(nA):
+                        out = out + ws[2*ks + si] * wa[2*ka + sj] * c[..., 2*ks + ka]
+    return out
+
+def _lagrange3(x, xs, fs):
+    # first and second derivative at x of the quadratic through (xs[k], fs[k]), k = 0..2
+    x0, x1, x2 = xs
+    d0 = (x0 - x1) * (x0 - x2); d1 = (x1 - x0) * (x1 - x2); d2 = (x2 - x0) * (x2 - x1)
+    f1 = fs[0] * ((x - x1) + (x - x2)) / d0 + fs[1] * ((x - x0) + (x - x2)) / d1 + fs[2] * ((x - x0) + (x - x1)) / d2
+    f2 = 2.0 * (fs[0] / d0 + fs[1] / d1 + fs[2] / d2)
+    return f1, f2
+
+def surface_derivatives(V, Sg, Ag, S, A):
+    # (dV/dS, d2V/dS2, dV/dA) at (S, A) from quadratics through the three nodes nearest to
+    # S (resp. A), each node value interpolated linearly in the other coordinate
+    i = int(np.clip(np.argmin(np.abs(Sg - S)), 1, len(Sg) - 2))
+    j = int(np.clip(np.argmin(np.abs(Ag - A)), 1, len(Ag) - 2))
+    j0, j1, b = linear_weights(Ag, np.asarray(A))
+    fs = [(1 - b) * V[k, j0] + b * V[k, j1] for k in (i-1, i, i+1)]
+    dS, dSS = _lagrange3(S, Sg[i-1:i+2], fs)
+    i0, i1, a = linear_weights(Sg, np.asarray(S))
+    fa = [(1 - a) * V[i0, k] + a * V[i1, k] for k in (j-1, j, j+1)]
+    dA, _ = _lagrange3(A, Ag[j-1:j+2], fa)
+    return float(dS), float(dSS), float(dA)
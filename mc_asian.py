@@ -1,33 +1,437 @@
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.stats import norm, qmc
+from frontier import ExerciseFrontier
 
-def asian_euro_mc(S0, K, r, sigma, T, M, paths=100_000, q=0.0, call=True, seed=42, antithetic=True):
+CONTROLS = (None, 'geometric')
+METHODS = ('mc', 'qmc')
+
+def geometric_asian_price(S0, K, r, sigma, T, M, q=0.0, call=True):
+    # closed form for the discretely monitored geometric average over t_k = k*T/M, k = 1..M:
+    # log G is normal with mean log S0 + nu*dt*(M+1)/2 and variance sigma^2*dt*(M+1)(2M+1)/(6M)
+    dt = T / M
+    m = np.log(S0) + (r - q - 0.5 * sigma**2) * dt * (M + 1) / 2
+    v = sigma**2 * dt * (M + 1) * (2*M + 1) / (6*M)
+    d1 = (m - np.log(K) + v) / np.sqrt(v)
+    d2 = d1 - np.sqrt(v)
+    F = np.exp(m + 0.5 * v)
+    if call:
+        return np.exp(-r * T) * (F * norm.cdf(d1) - K * norm.cdf(d2))
+    return np.exp(-r * T) * (K * norm.cdf(-d2) - F * norm.cdf(-d1))
+
+def asian_euro_mc(S0, K, r, sigma, T, M, paths=100_000, q=0.0, call=True, seed=42, antithetic=True,
+                  chunk=None, workers=1, control=None, return_stats=False, method='mc', replications=16):
+    # chunk/workers select the streaming estimator: paths in fixed-size chunks with
+    # SeedSequence.spawn streams, reduced to running (count, mean, M2); the result
+    # depends on (seed, paths, chunk) only, not on the worker count.
+    # control='geometric' regresses on the geometric-average payoff of the same paths
+    # (known mean geometric_asian_price) with the coefficient estimated from the paths.
+    # return_stats adds a dict with the variance-reduction factor and effective path count.
+    # method='qmc' uses scrambled Sobol points with a Brownian-bridge path construction,
+    # paths split into independently scrambled replications that give the error estimate.
+    if control not in CONTROLS:
+        raise ValueError(f'control must be one of {CONTROLS}')
+    if method not in METHODS:
+        raise ValueError(f'method must be one of {METHODS}')
+    if method == 'qmc':
+        if chunk is not None:
+            raise ValueError('chunk does not apply to qmc: each replication is one chunk')
+        out = _asian_euro_qmc(S0, K, r, sigma, T, M, paths, q, call, seed, replications, workers, control)
+        return out if return_stats else out[:3]
+    if chunk is not None or workers > 1:
+        out = _asian_euro_mc_stream(S0, K, r, sigma, T, M, paths, q, call, seed, antithetic,
+                                    50_000 if chunk is None else chunk, workers, control)
+        return out if return_stats else out[:3]
     rng = np.random.default_rng(seed)
     dt = T / M
     nudt = (r - q - 0.5 * sigma**2) * dt
     sigsdt = sigma * np.sqrt(dt)
     disc = np.exp(-r * T)
+    geo = control == 'geometric'
     if antithetic:
         assert paths % 2 == 0
         half = paths // 2
         Z = rng.standard_normal(size=(half, M))
         Zanti = -Z
-        p1 = _asian_payoffs_from_Z(S0, K, nudt, sigsdt, Z, M, call)
-        p2 = _asian_payoffs_from_Z(S0, K, nudt, sigsdt, Zanti, M, call)
+        p1 = _asian_payoffs_from_Z(S0, K, nudt, sigsdt, Z, M, call, geo)
+        p2 = _asian_payoffs_from_Z(S0, K, nudt, sigsdt, Zanti, M, call, geo)
         payoff = 0.5 * (p1 + p2)
     else:
         Z = rng.standard_normal(size=(paths, M))
-        payoff = _asian_payoffs_from_Z(S0, K, nudt, sigsdt, Z, M, call)
+        payoff = _asian_payoffs_from_Z(S0, K, nudt, sigsdt, Z, M, call, geo)
     payoff_disc = disc * payoff
+    if geo:
+        mean = payoff_disc.mean(axis=0)
+        D = payoff_disc - mean
+        out = _estimate(len(D), mean, D.T @ D, paths, S0, K, r, sigma, T, M, q, call)
+        return out if return_stats else out[:3]
     est = payoff_disc.mean()
     se = payoff_disc.std(ddof=1) / np.sqrt(payoff_disc.shape[0])
     ci = (est - 1.96*se, est + 1.96*se)
+    if return_stats:
+        return est, ci, se, {'vr_factor': 1.0, 'effective_paths': float(paths)}
     return est, ci, se
-def _asian_payoffs_from_Z(S0, K, nudt, sigsdt, Z, M, call=True):
-    P = Z.shape[0]
-    S = np.full(P, S0, dtype=float)
-    acc = np.zeros(P, dtype=float)
-    for k in range(M):
-        S *= np.exp(nudt + sigsdt * Z[:, k])
-        acc += S
-    A = acc / M
-    return np.maximum(A - K, 0.0) if call else np.maximum(K - A, 0.0)
+def _asian_payoffs_from_Z(S0, K, nudt, sigsdt, Z, M, call=True, geo=False):
+    # geo=True also returns the geometric-average payoff, as columns (arithmetic, geometric)
+    L = np.cumsum(nudt + sigsdt * Z, axis=1)
+    return _asian_payoffs_from_logS(S0, K, L, M, call, geo)
+def _asian_payoffs_from_logS(S0, K, L, M, call=True, geo=False):
+    # L[p, k] = log(S_{k+1} / S0) on the monitoring dates
+    A = S0 * np.exp(L).sum(axis=1) / M
+    pay = np.maximum(A - K, 0.0) if call else np.maximum(K - A, 0.0)
+    if not geo:
+        return pay
+    G = S0 * np.exp(L.sum(axis=1) / M)
+    return np.stack([pay, np.maximum(G - K, 0.0) if call else np.maximum(K - G, 0.0)], axis=1)
+def _estimate(n, mean, C, paths, S0, K, r, sigma, T, M, q, call):
+    # control-variate estimate from the sample mean and co-moment matrix of
+    # (arithmetic, geometric) discounted payoffs
+    beta = C[0, 1] / C[1, 1] if C[1, 1] > 0 else 0.0
+    est = mean[0] - beta * (mean[1] - geometric_asian_price(S0, K, r, sigma, T, M, q, call))
+    var_plain = C[0, 0] / (n - 1)
+    var_cv = max(C[0, 0] - beta * C[0, 1], 0.0) / (n - 1)
+    se = np.sqrt(var_cv / n)
+    vr = var_plain / var_cv if var_cv > 0 else np.inf
+    stats = {'vr_factor': float(vr), 'effective_paths': float(paths * vr), 'beta': float(beta)}
+    return est, (est - 1.96*se, est + 1.96*se), se, stats
+
+def _mc_chunk(job):
+    # (count, mean, co-moment) of the discounted payoff samples of one chunk (columns
+    # (arithmetic, geometric) with the control); with antithetic variates a sample is
+    # the average over a pair, as in the in-memory estimator
+    S0, K, nudt, sigsdt, disc, M, n, call, antithetic, geo, ss = job
+    rng = np.random.default_rng(ss)
+    if antithetic:
+        Z = rng.standard_normal(size=(n // 2, M))
+        x = 0.5 * (_asian_payoffs_from_Z(S0, K, nudt, sigsdt, Z, M, call, geo)
+                   + _asian_payoffs_from_Z(S0, K, nudt, sigsdt, -Z, M, call, geo))
+    else:
+        x = _asian_payoffs_from_Z(S0, K, nudt, sigsdt, rng.standard_normal(size=(n, M)), M, call, geo)
+    x = (disc * x).reshape(x.shape[0], -1)
+    mean = x.mean(axis=0)
+    D = x - mean
+    return x.shape[0], mean, D.T @ D
+def _merge_moments(a, b):
+    # Chan et al. pairwise update of (count, mean, co-moment)
+    na, ma, ca = a; nb, mb, cb = b
+    n = na + nb
+    d = mb - ma
+    return n, ma + d * nb / n, ca + cb + np.outer(d, d) * na * nb / n
+def _asian_euro_mc_stream(S0, K, r, sigma, T, M, paths, q, call, seed, antithetic, chunk, workers, control):
+    if antithetic:
+        assert paths % 2 == 0
+        chunk = max(2, chunk - chunk % 2)
+    dt = T / M
+    nudt = (r - q - 0.5 * sigma**2) * dt
+    sigsdt = sigma * np.sqrt(dt)
+    disc = np.exp(-r * T)
+    geo = control == 'geometric'
+    sizes = [chunk] * (paths // chunk) + ([paths % chunk] if paths % chunk else [])
+    seqs = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(S0, K, nudt, sigsdt, disc, M, n, call, antithetic, geo, ss) for n, ss in zip(sizes, seqs)]
+    acc = (0, 0.0, 0.0)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            # map yields in submission order, so the reduction order is fixed
+            for mom in ex.map(_mc_chunk, jobs):
+                acc = _merge_moments(acc, mom)
+    else:
+        for job in jobs:
+            acc = _merge_moments(acc, _mc_chunk(job))
+    n, mean, C = acc
+    if geo:
+        return _estimate(n, mean, C, paths, S0, K, r, sigma, T, M, q, call)
+    est = mean[0]
+    se = np.sqrt(C[0, 0] / (n - 1)) / np.sqrt(n)
+    return est, (est - 1.96*se, est + 1.96*se), se, {'vr_factor': 1.0, 'effective_paths': float(paths)}
+
+def _bridge_levels(M):
+    # Brownian-bridge order on the dates k = 1..M (unit spacing): W_M first, then the
+    # midpoints of each bracketing interval, level by level. Each level is a tuple
+    # (dims, idx, left, right, wl, wr, sd) of arrays; left = 0 means W(0) = 0.
+    levels = [(np.array([0]), np.array([M]), np.array([0]), np.array([M]),
+               np.array([0.0]), np.array([0.0]), np.array([np.sqrt(M)]))]
+    intervals, d = [(0, M)], 1
+    while intervals:
+        rows, nxt = [], []
+        for a, b in intervals:
+            if b - a < 2:
+                continue
+            m = (a + b) // 2
+            rows.append((d, m, a, b, (b - m) / (b - a), (m - a) / (b - a), np.sqrt((m - a) * (b - m) / (b - a))))
+            d += 1
+            nxt += [(a, m), (m, b)]
+        if rows:
+            levels.append(tuple(np.array(c) for c in zip(*rows)))
+        intervals = nxt
+    return levels
+def _brownian_bridge(Z, levels):
+    # W[:, k] = W(k) (unit time step) with the leading columns of Z carrying the coarse scales
+    W = np.zeros((Z.shape[0], Z.shape[1] + 1))
+    for dims, idx, left, right, wl, wr, sd in levels:
+        W[:, idx] = wl * W[:, left] + wr * W[:, right] + sd * Z[:, dims]
+    return W[:, 1:]
+def _qmc_replication(job):
+    # discounted payoffs of one independently scrambled Sobol replication
+    S0, K, nudt, sigsdt, disc, M, n, call, geo, levels, ss = job
+    sob = qmc.Sobol(d=M, scramble=True, seed=np.random.default_rng(ss))
+    m = int(np.log2(n))
+    U = sob.random_base2(m) if 2**m == n else sob.random(n)
+    Z = norm.ppf(U)
+    L = nudt * np.arange(1, M + 1) + sigsdt * _brownian_bridge(Z, levels)
+    return disc * _asian_payoffs_from_logS(S0, K, L, M, call, geo)
+def _asian_euro_qmc(S0, K, r, sigma, T, M, paths, q, call, seed, replications, workers, control):
+    # randomized QMC: the estimate is the mean of the replication means, its standard
+    # error their spread; with the control, beta is pooled over all points
+    R = replications
+    n = paths // R
+    if R < 2 or n < 1:
+        raise ValueError('qmc needs at least 2 replications of at least one point')
+    dt = T / M
+    nudt = (r - q - 0.5 * sigma**2) * dt
+    sigsdt = sigma * np.sqrt(dt)
+    disc = np.exp(-r * T)
+    geo = control == 'geometric'
+    levels = _bridge_levels(M)
+    jobs = [(S0, K, nudt, sigsdt, disc, M, n, call, geo, levels, ss)
+            for ss in np.random.SeedSequence(seed).spawn(R)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            X = np.stack(list(ex.map(_qmc_replication, jobs)))
+    else:
+        X = np.stack([_qmc_replication(job) for job in jobs])
+    stats = {}
+    if geo:
+        D = X.reshape(R * n, 2) - X.reshape(R * n, 2).mean(axis=0)
+        C = D.T @ D
+        beta = C[0, 1] / C[1, 1] if C[1, 1] > 0 else 0.0
+        means = X[..., 0].mean(axis=1) - beta * (X[..., 1].mean(axis=1)
+                                                 - geometric_asian_price(S0, K, r, sigma, T, M, q, call))
+        var_path = X[..., 0].var(ddof=1)
+        stats['beta'] = float(beta)
+    else:
+        means = X.mean(axis=1)
+        var_path = X.var(ddof=1)
+    est = means.mean()
+    se = means.std(ddof=1) / np.sqrt(R)
+    # effective paths: plain-MC paths with the same standard error
+    eff = var_path / se**2 if se > 0 else np.inf
+    stats.update({'vr_factor': float(eff / (R * n)), 'effective_paths': float(eff)})
+    return est, (est - 1.96*se, est + 1.96*se), se, stats
+
+def _lsm_basis(S, A, K, degree):
+    # monomials (S/K)^i (A/K)^j, i + j <= degree, on the last axis
+    x = np.asarray(S) / K; y = np.asarray(A) / K
+    x, y = np.broadcast_arrays(x, y)
+    return np.stack([x**i * y**j for d in range(degree + 1) for i in range(d, -1, -1) for j in [d - i]], axis=-1)
+def _lsm_states(rng, n, S0, A0, nudt, sigsdt, N, mon, k_prev, steps):
+    # (S, A) of n paths at the given steps (all >= 1), with the DPSolverAsian running-average
+    # convention: A_n = (sum of monitored S_m, 1 <= m <= n) / k_prev[n], A0 before any fixing
+    S = S0 * np.exp(np.cumsum(nudt + sigsdt * rng.standard_normal(size=(n, N)), axis=1))
+    C = np.cumsum(S * mon[1:], axis=1)
+    idx = np.asarray(steps) - 1
+    kp = k_prev[steps]
+    A = np.where(kp > 0, C[:, idx] / np.maximum(kp, 1), A0)
+    return S[:, idx], A
+def _lsm_chunk(job):
+    # (count, mean, M2) of the discounted cash flows of one chunk under the fitted stopping rule
+    (S0, A0, K, call, r, dt, nudt, sigsdt, N, mon, k_prev, ex_steps, coefs, degree, n, ss) = job
+    rng = np.random.default_rng(ss)
+    S, A = _lsm_states(rng, n, S0, A0, nudt, sigsdt, N, mon, k_prev, list(ex_steps) + [N])
+    pay = np.maximum(A - K, 0.0) if call else np.maximum(K - A, 0.0)
+    value = pay[:, -1] * np.exp(-r * N * dt)
+    stopped = np.zeros(n, dtype=bool)
+    for e, (step, coef) in enumerate(zip(ex_steps, coefs)):
+        cont = _lsm_basis(S[:, e], A[:, e], K, degree) @ coef
+        stop = ~stopped & (pay[:, e] > 0) & (pay[:, e] >= cont)
+        value[stop] = pay[stop, e] * np.exp(-r * step * dt)
+        stopped |= stop
+    x = value.reshape(n, 1)
+    mean = x.mean(axis=0)
+    D = x - mean
+    return n, mean, D.T @ D
+def asian_lsm(S0, K, r, sigma, T, N, paths=100_000, q=0.0, call=False, A0=None, monitor_schedule=None,
+              exercise_schedule=None, seed=42, train_paths=50_000, degree=2, chunk=50_000, workers=1,
+              S_grid=None, A_grid=None):
+    """Longstaff-Schwartz price of a Bermudan/American arithmetic Asian.
+
+    N steps of T/N with the DPSolverAsian conventions: monitor_schedule in 1..N (all by
+    default; a 0 is ignored, A0 is not a fixing), exercise_schedule in 0..N-1, payoff at
+    N. The stopping rule regresses discounted cash flows on monomials in (S/K, A/K) up to
+    degree over the in-the-money paths of train_paths training paths. It is then
+    applied to paths independent paths, simulated in chunks (SeedSequence.spawn
+    streams, process pool for workers > 1). The estimate is therefore a low-biased
+    (lower-bound) price. Returns (est, ci, se, frontiers): frontiers maps each exercise
+    step >= 1 to the ExerciseFrontier of the fitted rule on (S_grid, A_grid), or is None
+    without grids.
+    """
+    A0 = S0 if A0 is None else A0
+    monitor_schedule = set(range(1, N + 1)) if monitor_schedule is None else set(monitor_schedule)
+    exercise_schedule = sorted(set(exercise_schedule or []))
+    mon = np.array([n in monitor_schedule for n in range(N + 1)], dtype=int)
+    mon[0] = 0
+    k_prev = np.cumsum(mon)
+    dt = T / N
+    nudt = (r - q - 0.5 * sigma**2) * dt
+    sigsdt = sigma * np.sqrt(dt)
+    ex_steps = [n for n in exercise_schedule if n >= 1]
+    train_ss, price_ss = np.random.SeedSequence(seed).spawn(2)
+
+    # regression pass: states at the exercise dates only, training set in chunks
+    parts = []
+    for m, ss in zip(range(0, train_paths, chunk), train_ss.spawn(-(-train_paths // chunk))):
+        parts.append(_lsm_states(np.random.default_rng(ss), min(chunk, train_paths - m), S0, A0, nudt, sigsdt,
+                                 N, mon, k_prev, ex_steps + [N]))
+    S = np.concatenate([p[0] for p in parts]); A = np.concatenate([p[1] for p in parts])
+    pay = np.maximum(A - K, 0.0) if call else np.maximum(K - A, 0.0)
+    cash = pay[:, -1].copy()
+    t_cash = np.full(len(cash), N)
+    coefs = [None] * len(ex_steps)
+    for e in range(len(ex_steps) - 1, -1, -1):
+        step = ex_steps[e]
+        y = cash * np.exp(-r * (t_cash - step) * dt)
+        itm = pay[:, e] > 0
+        X = _lsm_basis(S[itm, e], A[itm, e], K, degree)
+        if itm.sum() <= X.shape[1]:
+            continue  # too few in-the-money paths to fit: never exercise on this date
+        coefs[e] = np.linalg.lstsq(X, y[itm], rcond=None)[0]
+        stop = np.zeros(len(cash), dtype=bool)
+        stop[itm] = pay[itm, e] >= X @ coefs[e]
+        cash[stop] = pay[stop, e]; t_cash[stop] = step
+    ex_steps_fit = [n for n, c in zip(ex_steps, coefs) if c is not None]
+    coefs_fit = [c for c in coefs if c is not None]
+
+    ex0 = max(A0 - K, 0.0) if call else max(K - A0, 0.0)
+    if 0 in exercise_schedule and ex0 > 0 and ex0 >= float(np.mean(cash * np.exp(-r * t_cash * dt))):
+        est, se = ex0, 0.0
+    else:
+        sizes = [chunk] * (paths // chunk) + ([paths % chunk] if paths % chunk else [])
+        jobs = [(S0, A0, K, call, r, dt, nudt, sigsdt, N, mon, k_prev, ex_steps_fit, coefs_fit, degree, n, ss)
+                for n, ss in zip(sizes, price_ss.spawn(len(sizes)))]
+        acc = (0, 0.0, 0.0)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                for mom in ex.map(_lsm_chunk, jobs):
+                    acc = _merge_moments(acc, mom)
+        else:
+            for job in jobs:
+                acc = _merge_moments(acc, _lsm_chunk(job))
+        n, mean, C = acc
+        est = float(mean[0]); se = float(np.sqrt(C[0, 0] / (n - 1) / n))
+
+    frontiers = None
+    if S_grid is not None and A_grid is not None:
+        frontiers = {}
+        exg = np.broadcast_to(np.maximum(A_grid - K, 0.0) if call else np.maximum(K - A_grid, 0.0),
+                              (len(S_grid), len(A_grid)))
+        B = _lsm_basis(S_grid[:, None], A_grid[None, :], K, degree)
+        for step, coef in zip(ex_steps, coefs):
+            cont = B @ coef if coef is not None else np.full(exg.shape, np.inf)
+            frontiers[step] = ExerciseFrontier.from_gap(S_grid, A_grid, np.where(exg > 0, exg - cont, -1.0))
+    return est, (est - 1.96*se, est + 1.96*se), se, frontiers
+
+def _strike_payoffs(A, Ks, calls):
+    # (n, P) payoffs of the averages A against every (strike, call flag) row
+    d = A[:, None] - Ks[None, :]
+    return np.maximum(np.where(calls, d, -d), 0.0)
+def _column_moments(x, y):
+    # (count, mean_x, mean_y, Cxx, Cyy, Cxy) per column
+    mx, my = x.mean(axis=0), y.mean(axis=0)
+    dx, dy = x - mx, y - my
+    return x.shape[0], mx, my, (dx * dx).sum(axis=0), (dy * dy).sum(axis=0), (dx * dy).sum(axis=0)
+def _merge_column_moments(a, b):
+    if a is None:
+        return b
+    na, mxa, mya, xxa, yya, xya = a; nb, mxb, myb, xxb, yyb, xyb = b
+    n = na + nb
+    dx, dy = mxb - mxa, myb - mya
+    f = na * nb / n
+    return (n, mxa + dx * nb / n, mya + dy * nb / n, xxa + xxb + dx * dx * f,
+            yya + yyb + dy * dy * f, xya + xyb + dx * dy * f)
+def _strikes_job(job):
+    # column moments of the (arithmetic, geometric) payoffs of one chunk or QMC replication
+    S0, nudt, sigsdt, M, n, antithetic, Ks, calls, method, levels, ss = job
+    if method == 'qmc':
+        sob = qmc.Sobol(d=M, scramble=True, seed=np.random.default_rng(ss))
+        m = int(np.log2(n))
+        Z = norm.ppf(sob.random_base2(m) if 2**m == n else sob.random(n))
+        L = [nudt * np.arange(1, M + 1) + sigsdt * _brownian_bridge(Z, levels)]
+    else:
+        rng = np.random.default_rng(ss)
+        Z = rng.standard_normal(size=(n // 2 if antithetic else n, M))
+        L = [np.cumsum(nudt + sigsdt * z, axis=1) for z in ((Z, -Z) if antithetic else (Z,))]
+    x = sum(_strike_payoffs(S0 * np.exp(l).sum(axis=1) / M, Ks, calls) for l in L) / len(L)
+    y = sum(_strike_payoffs(S0 * np.exp(l.sum(axis=1) / M), Ks, calls) for l in L) / len(L)
+    return _column_moments(x, y)
+def asian_euro_mc_strikes(S0, Ks, r, sigma, T, M, paths=100_000, q=0.0, calls=True, discounts=None, seed=42,
+                          antithetic=True, chunk=50_000, workers=1, control=None, method='mc', replications=16):
+    """Price many European Asian payoffs on one set of simulated averages.
+
+    Ks, calls and discounts (default exp(-r*T)) broadcast to P rows; each path's arithmetic
+    (and geometric) average is computed once and evaluated against every row, so the rows
+    share common random numbers. Paths are simulated in chunks (or QMC replications)
+    with the same SeedSequence streams as asian_euro_mc(chunk=...), which a row therefore
+    reproduces. Returns a list of P dicts with K, call, discount, est, ci_lo, ci_hi, se and
+    the stats of asian_euro_mc(return_stats=True): vr_factor, effective_paths (and beta
+    with the control).
+    """
+    if control not in CONTROLS:
+        raise ValueError(f'control must be one of {CONTROLS}')
+    if method not in METHODS:
+        raise ValueError(f'method must be one of {METHODS}')
+    Ks, calls, dfs = np.broadcast_arrays(np.asarray(Ks, dtype=float), np.asarray(calls, dtype=bool),
+                                         np.exp(-r * T) if discounts is None else np.asarray(discounts, dtype=float))
+    Ks, calls, dfs = np.atleast_1d(Ks).ravel(), np.atleast_1d(calls).ravel(), np.atleast_1d(dfs).ravel()
+    dt = T / M
+    nudt = (r - q - 0.5 * sigma**2) * dt
+    sigsdt = sigma * np.sqrt(dt)
+    if method == 'qmc':
+        sizes = [paths // replications] * replications
+        levels = _bridge_levels(M)
+    else:
+        if antithetic:
+            assert paths % 2 == 0
+            chunk = max(2, chunk - chunk % 2)
+        sizes = [chunk] * (paths // chunk) + ([paths % chunk] if paths % chunk else [])
+        levels = None
+    jobs = [(S0, nudt, sigsdt, M, n, antithetic, Ks, calls, method, levels, ss)
+            for n, ss in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes)))]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            moms = list(ex.map(_strikes_job, jobs))
+    else:
+        moms = [_strikes_job(job) for job in jobs]
+    acc = None
+    for mom in moms:
+        acc = _merge_column_moments(acc, mom)
+    n, mx, my, xx, yy, xy = acc
+    geo = control == 'geometric'
+    if geo:
+        beta = np.where(yy > 0, xy / np.where(yy > 0, yy, 1.0), 0.0)
+        gmean = np.array([geometric_asian_price(S0, K, r, sigma, T, M, q, c) for K, c in zip(Ks, calls)]) * np.exp(r * T)
+    else:
+        beta, gmean = np.zeros_like(Ks), my
+    if method == 'qmc':
+        # replication means give the error; beta pooled over all points
+        means = np.stack([m[1] - beta * (m[2] - gmean) for m in moms])
+        est = means.mean(axis=0)
+        se = means.std(axis=0, ddof=1) / np.sqrt(len(moms))
+    else:
+        est = mx - beta * (my - gmean)
+        se = np.sqrt(np.maximum(xx - beta * xy, 0.0) / (n - 1) / n)
+    rows = []
+    for p in range(len(Ks)):
+        e, s = dfs[p] * est[p], dfs[p] * se[p]
+        row = {'K': float(Ks[p]), 'call': bool(calls[p]), 'discount': float(dfs[p]),
+               'est': float(e), 'ci_lo': float(e - 1.96*s), 'ci_hi': float(e + 1.96*s), 'se': float(s)}
+        # the stats of asian_euro_mc(return_stats=True); n counts samples (antithetic pairs)
+        if geo or method == 'qmc':
+            var_path = xx[p] / (n - 1)
+            vr = var_path / se[p]**2 / n if se[p] > 0 else np.inf
+        else:
+            vr = 1.0
+        row.update({'vr_factor': float(vr), 'effective_paths': float(sum(sizes) * vr)})
+        if geo:
+            row['beta'] = float(beta[p])
+        rows.append(row)
+    return rows
@@ -0,0 +1,194 @@
+import os, pickle, hashlib
+from collections import OrderedDict
+import numpy as np
+
+# modules whose source enters every key: editing the numerics invalidates old results
+CODE_MODULES = ('dp_asian', 'dp_reduced', 'dp_scenarios', 'interp2d', 'gh', 'grids', 'frontier', 'mc_asian')
+# solver attributes that do not change results (bit-identical by construction)
+VOLATILE = {'stats', 'workers', 'op_cache', 'store'}
+
+_code_version = None
+def code_version():
+    """sha1 over the source files of CODE_MODULES."""
+    global _code_version
+    if _code_version is None:
+        h = hashlib.sha1()
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in CODE_MODULES:
+            path = os.path.join(here, name + '.py')
+            h.update(name.encode())
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    h.update(f.read())
+        _code_version = h.hexdigest()
+    return _code_version
+
+def _feed(h, obj):
+    # canonical, type-tagged serialization of plain values, arrays and containers
+    if obj is None or isinstance(obj, (bool, np.bool_)):
+        h.update(repr(None if obj is None else bool(obj)).encode())
+    elif isinstance(obj, (int, np.integer)):
+        h.update(b'i' + str(int(obj)).encode())
+    elif isinstance(obj, (float, np.floating)):
+        h.update(b'f' + float(obj).hex().encode())
+    elif isinstance(obj, str):
+        h.update(b's' + obj.encode() + b'\0')
+    elif isinstance(obj, bytes):
+        h.update(b'b' + obj + b'\0')
+    elif isinstance(obj, np.ndarray):
+        h.update(b'a' + obj.dtype.str.encode() + repr(obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, np.dtype):
+        h.update(b'd' + obj.str.encode())
+    elif isinstance(obj, type):
+        h.update(b't' + (obj.__module__ + '.' + obj.__qualname__).encode())
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'(' if isinstance(obj, tuple) else b'[')
+        for x in obj:
+            _feed(h, x)
+        h.update(b')')
+    elif isinstance(obj, (set, frozenset)):
+        h.update(b'{')
+        for x in sorted(stable_hash(x) for x in obj):
+            h.update(x.encode())
+        h.update(b'}')
+    elif isinstance(obj, dict):
+        h.update(b'<')
+        for k in sorted(obj, key=stable_hash):
+            _feed(h, k); _feed(h, obj[k])
+        h.update(b'>')
+    else:
+        raise TypeError(f'cannot hash {type(obj).__name__} into a cache key')
+
+def stable_hash(obj):
+    """Hex digest of obj that is stable across processes and sessions."""
+    h = hashlib.sha1()
+    _feed(h, obj)
+    return h.hexdigest()
+
+def _plain(v):
+    try:
+        stable_hash(v)
+        return True
+    except TypeError:
+        return False
+
+def solver_fingerprint(solver):
+    """Public plain-valued attributes of a solver (grids, contract, schedules, settings).
+
+    A private _fallback solver (DPSolverAsianReduced with exercise dates) is included.
+    """
+    out = {'class': type(solver)}
+    for k, v in vars(solver).items():
+        if not k.startswith('_') and k not in VOLATILE and _plain(v):
+            out[k] = v
+    fb = getattr(solver, '_fallback', None)
+    if fb is not None:
+        out['_fallback'] = solver_fingerprint(fb)
+    return out
+
+class ResultCache:
+    """Two-tier memo of pricing results keyed by stable hashes of all inputs and the code version.
+
+    The memory tier is an LRU of max_items results; the disk tier (directory, optional)
+    holds one pickle per key and is trimmed to max_bytes, least recently used first.
+    enabled=False computes every result (the --no-cache switch). stats counts hits per
+    tier and misses.
+    """
+    def __init__(self, directory=None, max_items=256, max_bytes=1 << 30, enabled=True):
+        self.directory, self.max_items, self.max_bytes, self.enabled = directory, max_items, max_bytes, enabled
+        self._mem = OrderedDict()
+        self.stats = {'hits_memory': 0, 'hits_disk': 0, 'misses': 0}
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.pkl')
+    def get(self, key):
+        """(found, value)."""
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            self.stats['hits_memory'] += 1
+            return True, self._mem[key]
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass  # evicted by another process meanwhile
+                self.stats['hits_disk'] += 1
+                self._remember(key, value)
+                return True, value
+        self.stats['misses'] += 1
+        return False, None
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self._evict()
+    def _remember(self, key, value):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+    def _evict(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.pkl'):
+                    p = os.path.join(root, name)
+                    try:
+                        st = os.stat(p)
+                    except FileNotFoundError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, p))
+        total = sum(s for _, s, _ in files)
+        for _, size, p in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass  # several processes may share the directory
+            total -= size
+    def memo(self, parts, compute):
+        """compute(), memoized on the hashable tuple parts."""
+        if not self.enabled:
+            return compute()
+        key = stable_hash((code_version(),) + parts)
+        found, value = self.get(key)
+        if not found:
+            value = compute()
+            self.put(key, value)
+        return value
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs), memoized on fn's qualified name and the arguments."""
+        return self.memo((fn.__module__, fn.__qualname__, args, kwargs), lambda: fn(*args, **kwargs))
+    def solve(self, solver, method, *args, **kwargs):
+        """getattr(solver, method)(*args, **kwargs), memoized on solver_fingerprint(solver)."""
+        return self.memo((solver_fingerprint(solver), method, args, kwargs),
+                         lambda: getattr(solver, method)(*args, **kwargs))
+    def summary(self):
+        s = self.stats
+        n = sum(s.values())
+        if not self.enabled:
+            return 'result cache: disabled'
+        return (f"result cache: {s['hits_memory']} memory + {s['hits_disk']} disk hits, {s['misses']} misses"
+                f" ({(s['hits_memory'] + s['hits_disk']) / n:.0%} hit rate)" if n else 'result cache: unused')
+
+_default = ResultCache()
+def default_cache():
+    return _default
+def configure(directory=None, enabled=True, **opts):
+    """Replace the process-wide cache used by the study scripts."""
+    global _default
+    _default = ResultCache(directory=directory, enabled=enabled, **opts)
+    return _default
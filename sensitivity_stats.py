@@ -5,24 +5,85 @@ import matplotlib.pyplot as plt
 
 from grids import s_grid_logspace, a_grid_linear
 from dp_asian import DPSolverAsian
+from dp_reduced import DPSolverAsianReduced
+from dp_scenarios import DPSolverAsianScenarios
+from result_cache import default_cache, configure
+from sweep_executor import run_sweep
 
-def dp_price(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, style="euro", berm_freq=5, is_call=False):
-    Sg = s_grid_logspace(S0, sigma, T, k=kgrid, NS=NS)
-    Ag = a_grid_linear(Sg, NA=NA)
-    monitor = list(range(1, N+1))
+STYLES = ["euro", "berm", "amer"]
+
+def exercise_schedule(style, N, berm_freq=5):
     if style == "euro":
-        exercise = []
+        return []
     elif style == "berm":
-        exercise = [n for n in range(0, N) if (n % berm_freq == 0 and n > 0)]
+        return [n for n in range(0, N) if (n % berm_freq == 0 and n > 0)]
     elif style == "amer":
-        exercise = list(range(0, N))
+        return list(range(0, N))
     else:
         raise ValueError("style must be euro|berm|amer")
-    solver = DPSolverAsian(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=is_call,
-                           K_gh=Kgh, monitor_schedule=monitor, exercise_schedule=exercise)
-    price, _ = solver.price(S0=S0, A0=S0)
+
+def dp_price(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, style="euro", berm_freq=5, is_call=False,
+             reduced=False, **solver_opts):
+    Sg = s_grid_logspace(S0, sigma, T, k=kgrid, NS=NS)
+    Ag = a_grid_linear(Sg, NA=NA)
+    monitor = list(range(1, N+1))
+    exercise = exercise_schedule(style, N, berm_freq)
+    # reduced=True prices the European style on the 1D reduced state
+    Solver = DPSolverAsianReduced if (reduced and style == "euro") else DPSolverAsian
+    solver = Solver(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=K, is_call=is_call,
+                    K_gh=Kgh, monitor_schedule=monitor, exercise_schedule=exercise,
+                    **solver_opts)
+    price, _ = default_cache().solve(solver, "price", S0=S0, A0=S0)
     return price
 
+def dp_price_styles(S0, strikes, r, q, sigma, T, NS, NA, N, Kgh, kgrid, berm_freq=5, is_call=False,
+                    reduced=False, **solver_opts):
+    """Price every strike in all three styles with one batched backward pass."""
+    if solver_opts.get("engine") == "loop":
+        # the loop engine has no price_batch: one solve per style and strike
+        return {style: [dp_price(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, style=style, berm_freq=berm_freq,
+                                 is_call=is_call, reduced=reduced, **solver_opts) for K in strikes]
+                for style in STYLES}
+    Sg = s_grid_logspace(S0, sigma, T, k=kgrid, NS=NS)
+    Ag = a_grid_linear(Sg, NA=NA)
+    solver = DPSolverAsian(Sg, Ag, T=T, N=N, r=r, q=q, sigma=sigma, K=strikes[0], is_call=is_call,
+                           K_gh=Kgh, monitor_schedule=list(range(1, N+1)), **solver_opts)
+    styles = ["berm", "amer"] if reduced else STYLES
+    specs = [(K, is_call, exercise_schedule(style, N, berm_freq)) for style in styles for K in strikes]
+    prices, _ = default_cache().solve(solver, "price_batch", S0, S0, specs)
+    out = {style: list(prices[i*len(strikes):(i+1)*len(strikes)]) for i, style in enumerate(styles)}
+    if reduced:
+        out["euro"] = [dp_price(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, style="euro",
+                                is_call=is_call, reduced=True, **solver_opts) for K in strikes]
+    return out
+
+def styles_point(S0, K, r, q, sigma, T, NS, NA, N, Kgh, kgrid, berm_freq=5, is_call=False, reduced=False,
+                 **solver_opts):
+    """One sweep point: {style: price} for a single strike."""
+    res = dp_price_styles(S0, [K], r, q, sigma, T, NS, NA, N, Kgh, kgrid, berm_freq=berm_freq, is_call=is_call,
+                          reduced=reduced, **solver_opts)
+    return {style: res[style][0] for style in STYLES}
+
+def sweep_styles(points, costs=None, jobs=1, out_csv=None):
+    """styles_point for every (ident, kwargs) point through the sweep executor; returns {style: [prices]}."""
+    rows = run_sweep(styles_point, points, jobs=jobs, out_csv=out_csv, costs=costs)
+    return {style: [row[style] for row in rows] for style in STYLES}
+
+def dp_price_scenarios(S0, K, rs, q, sigmas, T, NS, NA, N, Kgh, kgrid, berm_freq=5, is_call=False,
+                       reduced=False, jobs=1, out_csv=None, **solver_opts):
+    """Price all three styles for each (r, sigma) scenario; returns {style: [prices]}."""
+    if reduced or solver_opts.get("engine", "vector") != "vector" or solver_opts.get("exercise_band") is not None:
+        # one solve per scenario, run as independent sweep points
+        points = [({"r": float(r), "sigma": float(s)},
+                   dict(S0=S0, K=K, r=float(r), q=q, sigma=float(s), T=T, NS=NS, NA=NA, N=N, Kgh=Kgh, kgrid=kgrid,
+                        berm_freq=berm_freq, is_call=is_call, reduced=reduced, **solver_opts))
+                  for r, s in zip(*np.broadcast_arrays(rs, sigmas))]
+        return sweep_styles(points, jobs=jobs, out_csv=out_csv)
+    solver = DPSolverAsianScenarios(S0, T, N, rs, q, sigmas, K_gh=Kgh, NS=NS, NA=NA, kgrid=kgrid)
+    prices = default_cache().solve(solver, "price_batch",
+                                   [(K, is_call, exercise_schedule(style, N, berm_freq)) for style in STYLES])
+    return {style: list(prices[:, i]) for i, style in enumerate(STYLES)}
+
 def overlay_plot(xs, ys_dict, xlabel, title, out_png=None):
     plt.figure(figsize=(7.2, 4.4))
     order = ["euro", "berm", "amer"]
@@ -68,71 +129,79 @@ def main():
     ap.add_argument("--N", type=int, default=60)
     ap.add_argument("--Kgh", type=int, default=7)
     ap.add_argument("--kgrid", type=float, default=3.0)
+    ap.add_argument("--engine", choices=["vector", "sparse", "fft", "loop"], default="vector")
+    ap.add_argument("--op_cache", type=str, default=None,
+                    help="Directory for cached sparse transition operators (engine=sparse)")
+    ap.add_argument("--exercise_band", type=int, default=None,
+                    help="Skip continuation deeper than this many nodes inside the last exercise region")
     # Bermudan frequency
     ap.add_argument("--berm_freq", type=int, default=5)
+    ap.add_argument("--reduced", action="store_true",
+                    help="Price the European style with the 1D reduced-state solver")
     # Sweep grids
     ap.add_argument("--sigmas", type=str, default="0.10,0.20,0.30,0.40,0.50")
     ap.add_argument("--rates", type=str, default="0.00,0.02,0.05,0.08")
     ap.add_argument("--strikes", type=str, default="80,90,100,110,120")
     ap.add_argument("--M_list", type=str, default="12,24,52")
     # Output
+    ap.add_argument("--cache_dir", type=str, default=".result_cache",
+                    help="On-disk tier of the result cache (shared by the study scripts)")
+    ap.add_argument("--no-cache", dest="no_cache", action="store_true", help="Recompute every result")
+    ap.add_argument("--jobs", type=int, default=1, help="Processes for independent sweep points (largest grids first)")
+    ap.add_argument("--no-resume", dest="resume", action="store_false",
+                    help="Recompute sweep points already present in the *_points.csv logs")
     ap.add_argument("--outdir", type=str, default="sensitivity_figs")
     args = ap.parse_args()
 
     os.makedirs(args.outdir, exist_ok=True)
+    configure(directory=args.cache_dir, enabled=not args.no_cache)
+    solver_opts = dict(engine=args.engine, op_cache=args.op_cache, exercise_band=args.exercise_band, reduced=args.reduced)
 
-    # Helper to evaluate the three styles
-    def eval_three(fn_build):
-        vals = {}
-        for style in ["euro","berm","amer"]:
-            vals[style] = fn_build(style)
-        return vals
+    def points_csv(name):
+        # per-point rows streamed by the sweep executor (resume log); price_vs_*.csv is written at the end
+        path = os.path.join(args.outdir, f"price_vs_{name}_points.csv")
+        if not args.resume and os.path.exists(path):
+            os.remove(path)
+        return path
 
-    # 1) vs sigma
+    # 1) vs sigma (one scenario-batched solve)
     sigmas = [float(x) for x in args.sigmas.split(",") if x.strip()]
-    ys_dict = eval_three(lambda style: [
-        dp_price(args.S0, args.K, args.r, args.q, s, args.T, args.NS, args.NA, args.N, args.Kgh, args.kgrid,
-                 style=style, berm_freq=args.berm_freq, is_call=args.call)
-        for s in sigmas
-    ])
+    ys_dict = dp_price_scenarios(args.S0, args.K, args.r, args.q, sigmas, args.T, args.NS, args.NA, args.N,
+                                 args.Kgh, args.kgrid, berm_freq=args.berm_freq, is_call=args.call,
+                                 jobs=args.jobs, out_csv=points_csv("sigma"), **solver_opts)
     write_csv(sigmas, ys_dict, "sigma", os.path.join(args.outdir, "price_vs_sigma.csv"))
     overlay_plot(sigmas, ys_dict, "Volatility σ", "Price vs σ (European vs Bermudan vs American)",
                  out_png=os.path.join(args.outdir, "price_vs_sigma.png"))
 
-    # 2) vs r
+    # 2) vs r (one scenario-batched solve)
     rates = [float(x) for x in args.rates.split(",") if x.strip()]
-    ys_dict = eval_three(lambda style: [
-        dp_price(args.S0, args.K, r, args.q, args.sigma, args.T, args.NS, args.NA, args.N, args.Kgh, args.kgrid,
-                 style=style, berm_freq=args.berm_freq, is_call=args.call)
-        for r in rates
-    ])
+    ys_dict = dp_price_scenarios(args.S0, args.K, rates, args.q, args.sigma, args.T, args.NS, args.NA, args.N,
+                                 args.Kgh, args.kgrid, berm_freq=args.berm_freq, is_call=args.call,
+                                 jobs=args.jobs, out_csv=points_csv("r"), **solver_opts)
     write_csv(rates, ys_dict, "r", os.path.join(args.outdir, "price_vs_r.csv"))
     overlay_plot(rates, ys_dict, "Rate r", "Price vs r (European vs Bermudan vs American)",
                  out_png=os.path.join(args.outdir, "price_vs_r.png"))
 
-    # 3) vs K
+    # 3) vs K (all strikes share one backward pass)
     strikes = [float(x) for x in args.strikes.split(",") if x.strip()]
-    ys_dict = eval_three(lambda style: [
-        dp_price(args.S0, K, args.r, args.q, args.sigma, args.T, args.NS, args.NA, args.N, args.Kgh, args.kgrid,
-                 style=style, berm_freq=args.berm_freq, is_call=args.call)
-        for K in strikes
-    ])
+    ys_dict = dp_price_styles(args.S0, strikes, args.r, args.q, args.sigma, args.T, args.NS, args.NA, args.N,
+                              args.Kgh, args.kgrid, berm_freq=args.berm_freq, is_call=args.call, **solver_opts)
     write_csv(strikes, ys_dict, "K", os.path.join(args.outdir, "price_vs_K.csv"))
     overlay_plot(strikes, ys_dict, "Strike K", "Price vs K (European vs Bermudan vs American)",
                  out_png=os.path.join(args.outdir, "price_vs_K.png"))
 
     # 4) vs M (set N=M)
     Ms = [int(x) for x in args.M_list.split(",") if x.strip()]
-    ys_dict = {}
-    for style in ["euro","berm","amer"]:
-        ys = []
-        for M in Ms:
-            ys.append(dp_price(args.S0, args.K, args.r, args.q, args.sigma, args.T, args.NS, args.NA, M, args.Kgh, args.kgrid,
-                               style=style, berm_freq=args.berm_freq, is_call=args.call))
-        ys_dict[style] = ys
+    ys_dict = sweep_styles([({"M": M}, dict(S0=args.S0, K=args.K, r=args.r, q=args.q, sigma=args.sigma, T=args.T,
+                                            NS=args.NS, NA=args.NA, N=M, Kgh=args.Kgh, kgrid=args.kgrid,
+                                            berm_freq=args.berm_freq, is_call=args.call, **solver_opts))
+                            for M in Ms],
+                           costs=[args.NS * args.NA * M * args.Kgh for M in Ms], jobs=args.jobs,
+                           out_csv=points_csv("M"))
     write_csv(Ms, ys_dict, "M", os.path.join(args.outdir, "price_vs_M.csv"))
     overlay_plot(Ms, ys_dict, "Monitoring dates M", "Price vs M (European vs Bermudan vs American)",
                  out_png=os.path.join(args.outdir, "price_vs_M.png"))
+    print(default_cache().summary())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,97 @@
+import os, json, hashlib
+import numpy as np
+from interp2d import linear_weights, bilinear_apply
+from frontier import ExerciseFrontier
+
+def surface_key(solver):
+    """Content key of a solve: grids, contract, model and numerical settings."""
+    h = hashlib.sha1()
+    h.update(solver.Sg.tobytes()); h.update(solver.Ag.tobytes())
+    h.update(repr((solver.T, solver.N, solver.r, solver.q, solver.sigma, solver.K, solver.is_call,
+                   solver.K_gh, sorted(solver.monitor_schedule), sorted(solver.exercise_schedule),
+                   solver.dtype.str, solver.interp, solver.fuse_steps, solver.exercise_band, solver.engine)).encode())
+    return h.hexdigest()
+
+class StoredSurfaces:
+    """Read-only, memory-mapped V_n slices and exercise masks of one solve.
+
+    V[n] is the value at step n on (Sg, Ag), where A is the running average of the
+    k_prev[n] monitoring dates in 1..n; steps merged by fuse_steps are not stored.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        g = np.load(os.path.join(path, 'grids.npz'))
+        self.Sg, self.Ag, self.k_prev = g['Sg'], g['Ag'], g['k_prev']
+        self.steps = np.array(self.meta['steps'], dtype=int)
+        self.N = int(self.meta['N']); self.dt = float(self.meta['T']) / self.N
+        self.V = np.load(os.path.join(path, 'V.npy'), mmap_mode='r')
+        self.mask = np.load(os.path.join(path, 'mask.npy'), mmap_mode='r')
+    def _check(self, n):
+        if n not in self.meta['steps']:
+            raise KeyError(f'step {n} is not stored (fused); stored steps: {self.meta["steps"]}')
+    def price(self, n: int, S, A):
+        """Value at step n (time n*dt) for spot S and running average A (scalars or arrays)."""
+        self._check(n)
+        S = np.asarray(S, dtype=float); A = np.asarray(A, dtype=float)
+        out = bilinear_apply(np.asarray(self.V[n], dtype=np.float64), linear_weights(self.Sg, S),
+                             linear_weights(self.Ag, A))
+        return float(out) if out.ndim == 0 else out
+    def exercise(self, n: int, S, A):
+        """Exercise decision at step n from the stored mask at the nearest node."""
+        self._check(n)
+        i = np.clip(np.searchsorted(self.Sg, S), 1, len(self.Sg) - 1)
+        i = np.where(np.abs(self.Sg[i-1] - S) <= np.abs(self.Sg[i] - S), i - 1, i)
+        j = np.clip(np.searchsorted(self.Ag, A), 1, len(self.Ag) - 1)
+        j = np.where(np.abs(self.Ag[j-1] - A) <= np.abs(self.Ag[j] - A), j - 1, j)
+        return self.mask[n][i, j]
+    def frontier(self):
+        """ExerciseFrontier of the stored exercise dates, in chronological order (cell-midpoint crossings)."""
+        return [ExerciseFrontier.from_mask(self.Sg, self.Ag, self.mask[n]) for n in self.meta['exercise_steps']]
+
+class SurfaceStore:
+    """Directory of memory-mapped solves, one subdirectory per surface_key.
+
+    Each entry holds V.npy (N+1, NS, NA), mask.npy (N+1, NS, NA), grids.npz and
+    meta.json; meta.json is written last and marks the entry complete.
+    """
+    def __init__(self, root: str):
+        self.root = root
+    def _dir(self, key):
+        return os.path.join(self.root, key)
+    def has(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self._dir(key), 'meta.json'))
+    def open(self, key: str) -> StoredSurfaces:
+        return StoredSurfaces(self._dir(key))
+    def writer(self, solver):
+        return _SurfaceWriter(self._dir(surface_key(solver)), solver)
+
+class _SurfaceWriter:
+    def __init__(self, path, solver):
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self.path, self.solver = path, solver
+        shape = (solver.N + 1, solver.NS, solver.NA)
+        self.V = np.lib.format.open_memmap(os.path.join(path, 'V.npy'), mode='w+', dtype=solver.dtype, shape=shape)
+        self.mask = np.lib.format.open_memmap(os.path.join(path, 'mask.npy'), mode='w+', dtype=bool, shape=shape)
+        self.steps = []
+        self.exercise_steps = []
+    def write(self, n, V, mask=None):
+        self.V[n] = V
+        if mask is not None:
+            self.mask[n] = mask
+            self.exercise_steps.append(int(n))
+        self.steps.append(int(n))
+    def close(self):
+        s = self.solver
+        self.V.flush(); self.mask.flush()
+        del self.V, self.mask
+        np.savez(os.path.join(self.path, 'grids.npz'), Sg=s.Sg, Ag=s.Ag, k_prev=s._k_prev)
+        meta = {'T': s.T, 'N': s.N, 'r': s.r, 'q': s.q, 'sigma': s.sigma, 'K': s.K, 'is_call': s.is_call,
+                'steps': sorted(self.steps),
+                'exercise_steps': sorted(self.exercise_steps)}
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
@@ -0,0 +1,111 @@
+import csv, os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from result_cache import default_cache, configure, stable_hash, code_version
+
+def _parse(v):
+    # values read back from a resumed CSV
+    for conv in (int, float):
+        try:
+            return conv(v)
+        except ValueError:
+            pass
+    return v
+
+def _read_rows(path):
+    # complete rows of an earlier run; a short row (interrupted write) or one without a
+    # config hash (other code, older layout) is dropped
+    if not path or not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None, []
+    with open(path, newline="") as f:
+        rd = csv.DictReader(f)
+        if "config" not in (rd.fieldnames or []):
+            return None, []
+        rows = []
+        for row in rd:
+            if None in row or None in row.values() or len(row["config"]) != 40:
+                continue
+            rows.append({k: v if k == "config" else _parse(v) for k, v in row.items()})
+        return rd.fieldnames, rows
+
+def _point_config(fn, kwargs):
+    # stable hash of everything that determines a point's row: fn, its arguments, the code version
+    return stable_hash((code_version(), fn.__module__, fn.__qualname__, kwargs))
+
+def _run_point(fn, ident, kwargs, config):
+    # the row and the result-cache hits/misses it caused, reported back from workers
+    before = dict(default_cache().stats)
+    row = {**ident, **fn(**kwargs), "config": config}
+    return row, {k: v - before[k] for k, v in default_cache().stats.items()}
+
+def run_sweep(fn, points, jobs=1, out_csv=None, costs=None, resume=True, on_row=None):
+    """Evaluate the independent sweep points and stream their rows into out_csv.
+
+    points is a list of (ident, kwargs): ident holds the columns that identify a row
+    (e.g. {"param": "NS", "value": 121}) and the row is {**ident, **fn(**kwargs)} plus a
+    final config column hashing fn, kwargs and the code version. With jobs > 1 the
+    points run on a process pool, largest costs first, and each row is appended to
+    out_csv as soon as it finishes; the workers share the result cache configuration of
+    the caller. With resume, a point whose ident and config both match a row of out_csv
+    is not rerun; rows of the same ident under another config are stale and dropped from
+    the file, rows of other idents (e.g. other tags sharing the file) are kept. on_row(row)
+    is called for every new row. Returns all rows (resumed and new) in the order of points.
+    """
+    header, old = _read_rows(out_csv) if resume else (None, [])
+    keys = sorted(points[0][0]) if points else []
+    ident_key = lambda d: tuple(str(d.get(k)) for k in keys)
+    configs = [_point_config(fn, kwargs) for _, kwargs in points]
+    wanted = {ident_key(ident): c for (ident, _), c in zip(points, configs)}
+    old = [row for row in old if wanted.get(ident_key(row), row["config"]) == row["config"]]
+    seen = {(ident_key(row), row["config"]): row for row in old}
+    rows = [None] * len(points)
+    todo = []
+    for i, (ident, kwargs) in enumerate(points):
+        hit = seen.get((ident_key(ident), configs[i]))
+        if hit is not None:
+            rows[i] = hit
+        else:
+            todo.append(i)
+    if costs is not None:
+        todo.sort(key=lambda i: -costs[i])
+
+    f = writer = None
+    if out_csv:
+        d = os.path.dirname(os.path.abspath(out_csv))
+        os.makedirs(d, exist_ok=True)
+        # rewritten with the rows kept, then appended to as points finish
+        f = open(out_csv, "w", newline="")
+        if old:
+            writer = csv.DictWriter(f, fieldnames=header, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(old)
+            f.flush()
+    def emit(i, row):
+        nonlocal writer
+        rows[i] = row
+        if f is not None:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row.keys()), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(row)
+            f.flush()
+        if on_row is not None:
+            on_row(row)
+    try:
+        if jobs > 1 and len(todo) > 1:
+            cache = default_cache()
+            with ProcessPoolExecutor(max_workers=jobs, initializer=configure,
+                                     initargs=(cache.directory, cache.enabled)) as ex:
+                futs = {ex.submit(_run_point, fn, *points[i], configs[i]): i for i in todo}
+                for fut in as_completed(futs):
+                    row, counts = fut.result()
+                    for k, v in counts.items():
+                        cache.stats[k] += v
+                    emit(futs[fut], row)
+        else:
+            for i in todo:
+                emit(i, _run_point(fn, *points[i], configs[i])[0])
+    finally:
+        if f is not None:
+            f.close()
+    return rows
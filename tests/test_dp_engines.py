@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from dp_asian import DPSolverAsian
+from dp_reduced import DPSolverAsianReduced
+from dp_scenarios import DPSolverAsianScenarios
+from grids import s_grid_logspace, a_grid_linear, make_grids
+
+S0, T, N, R, Q, SIGMA = 100.0, 1.0, 12, 0.05, 0.0, 0.2
+AMER = list(range(1, N + 1))
+
+def grids(NS=41, NA=31):
+    Sg = s_grid_logspace(S0, SIGMA, T, NS=NS)
+    return Sg, a_grid_linear(Sg, NA=NA)
+
+def solver(K=100.0, is_call=False, exercise=None, Sg=None, Ag=None, **opts):
+    if Sg is None:
+        Sg, Ag = grids()
+    return DPSolverAsian(Sg, Ag, T, N, R, Q, SIGMA, K, is_call, exercise_schedule=exercise, **opts)
+
+@pytest.mark.parametrize("is_call", [True, False])
+@pytest.mark.parametrize("exercise", [None, AMER, [3, 6, 9]])
+def test_vector_loop_sparse_agree(is_call, exercise):
+    p_loop, f_loop = solver(is_call=is_call, exercise=exercise, engine='loop').price(S0, S0, return_frontier=True)
+    for engine in ('vector', 'sparse'):
+        p, f = solver(is_call=is_call, exercise=exercise, engine=engine).price(S0, S0, return_frontier=True)
+        assert p == pytest.approx(p_loop, rel=1e-12, abs=1e-12)
+        if exercise is not None:
+            assert len(f) == len(f_loop)
+            for a, b in zip(f, f_loop):
+                assert np.array_equal(np.asarray(a), np.asarray(b))
+
+@pytest.mark.parametrize("is_call", [True, False])
+def test_fft_reaches_reduced_reference(is_call):
+    # European: the 1D reduced-state solve is the grid-converged reference
+    ref, _ = DPSolverAsianReduced(None, None, T, N, R, Q, SIGMA, 100.0, is_call).price(S0, S0)
+    Sg, Ag = grids(321, 241)
+    p, _ = solver(is_call=is_call, Sg=Sg, Ag=Ag, engine='fft').price(S0, S0)
+    assert abs(p - ref) < 5e-3
+
+def test_workers_bit_identical():
+    Sg, Ag = make_grids('sinh', S0, SIGMA, T, 61, 51, K=100.0)
+    for engine in ('vector', 'sparse'):
+        p1, f1 = solver(exercise=AMER, Sg=Sg, Ag=Ag, engine=engine).price(S0, S0, return_frontier=True)
+        p3, f3 = solver(exercise=AMER, Sg=Sg, Ag=Ag, engine=engine, workers=3).price(S0, S0, return_frontier=True)
+        assert p1 == p3
+        for a, b in zip(f1, f3):
+            assert np.array_equal(np.asarray(a), np.asarray(b))
+
+def test_scenarios_match_separate_solves():
+    Sg, Ag = grids()
+    r, sigma = [0.03, 0.05, 0.05], [0.2, 0.2, 0.3]
+    sc = DPSolverAsianScenarios(S0, T, N, r=r, q=Q, sigma=sigma, S_grid=Sg, A_grid=Ag)
+    payoffs = [(100.0, True, None), (95.0, False, AMER)]
+    got = sc.price_batch(payoffs)
+    for b in range(3):
+        for p, (K, c, ex) in enumerate(payoffs):
+            ref, _ = DPSolverAsian(Sg, Ag, T, N, r[b], Q, sigma[b], K, c, exercise_schedule=ex).price(S0, S0)
+            assert got[b, p] == pytest.approx(ref, rel=1e-10, abs=1e-12)
+
+def test_price_batch_matches_single_solves():
+    payoffs = [(90.0, False, AMER), (110.0, False, AMER), (100.0, True, [4, 8]), (100.0, False, None)]
+    got, _ = solver().price_batch(S0, S0, payoffs)
+    for (K, c, ex), p in zip(payoffs, got):
+        assert p == pytest.approx(solver(K=K, is_call=c, exercise=ex).price(S0, S0)[0], rel=1e-12, abs=1e-12)
+
+@pytest.mark.parametrize("N_steps", [4, 10])
+@pytest.mark.parametrize("K", [100.0, 110.0])
+def test_exercise_band_matches_full_solve(N_steps, K):
+    # coarse schedules move the boundary by several nodes per step: the band must fall back
+    Sg = s_grid_logspace(S0, SIGMA, T, NS=241)
+    Ag = a_grid_linear(Sg, NA=201)
+    ex = list(range(1, N_steps + 1))
+    full, _ = DPSolverAsian(Sg, Ag, T, N_steps, R, Q, SIGMA, K, False, exercise_schedule=ex).price(S0, S0)
+    s = DPSolverAsian(Sg, Ag, T, N_steps, R, Q, SIGMA, K, False, exercise_schedule=ex, exercise_band=1)
+    assert s.price(S0, S0)[0] == full
+
+def test_exercise_band_rejects_zero_margin():
+    with pytest.raises(ValueError):
+        solver(exercise=AMER, exercise_band=0)
+
+def test_prune_keeps_price_and_rejects_frontier():
+    Sg, Ag = grids(81, 61)
+    full, _ = solver(exercise=AMER, Sg=Sg, Ag=Ag).price(S0, S0)
+    s = solver(exercise=AMER, Sg=Sg, Ag=Ag, prune_sd=8.0)
+    assert s.price(S0, S0)[0] == pytest.approx(full, abs=1e-8)
+    assert isinstance(s.stats['pruned_fraction'], float)
+    with pytest.raises(ValueError):
+        s.price(S0, S0, return_frontier=True)
+
+def test_float32_close_to_float64():
+    chk = solver(exercise=AMER, dtype=np.float32).check_precision(S0, S0)
+    assert chk['rel_diff'] < 1e-5
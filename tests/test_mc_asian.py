@@ -0,0 +1,30 @@
+import pytest
+
+from mc_asian import asian_euro_mc, asian_euro_mc_strikes
+
+ARGS = dict(S0=100.0, r=0.05, sigma=0.2, T=1.0, M=12, q=0.0)
+
+def test_streamed_mc_independent_of_workers():
+    one = asian_euro_mc(K=100.0, paths=40_000, chunk=10_000, workers=1, return_stats=True, **ARGS)
+    many = asian_euro_mc(K=100.0, paths=40_000, chunk=10_000, workers=3, return_stats=True, **ARGS)
+    assert one[0] == many[0] and one[2] == many[2]
+
+@pytest.mark.parametrize("control", [None, 'geometric'])
+def test_strike_ladder_matches_single_strike(control):
+    rows = asian_euro_mc_strikes(Ks=[90.0, 100.0, 110.0], paths=40_000, chunk=10_000, control=control, **ARGS)
+    for row in rows:
+        est, _, se = asian_euro_mc(K=row['K'], paths=40_000, chunk=10_000, control=control, **ARGS)
+        assert row['est'] == pytest.approx(est, rel=1e-10)
+        assert row['se'] == pytest.approx(se, rel=1e-8)
+
+@pytest.mark.parametrize("method,control", [('mc', None), ('mc', 'geometric'), ('qmc', None), ('qmc', 'geometric')])
+def test_strike_ladder_stats_match_single_strike(method, control):
+    # antithetic pairs: the variance ratio counts samples, not paths
+    opts = dict(paths=32_768, control=control, method=method, **ARGS)
+    if method == 'mc':
+        opts.update(chunk=8_192, antithetic=True)
+    row, = asian_euro_mc_strikes(Ks=[100.0], **opts)
+    *_, stats = asian_euro_mc(K=100.0, return_stats=True, **opts)
+    assert set(stats) <= set(row)
+    for k, v in stats.items():
+        assert row[k] == pytest.approx(v, rel=1e-8)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from dp_asian import DPSolverAsian
+from grids import s_grid_logspace, a_grid_linear
+from surface_store import SurfaceStore, surface_key
+
+def make(store, engine='vector'):
+    Sg = s_grid_logspace(100.0, 0.2, 1.0, NS=41)
+    return DPSolverAsian(Sg, a_grid_linear(Sg, NA=31), 1.0, 12, 0.05, 0.0, 0.2, 100.0, False,
+                         exercise_schedule=range(1, 13), engine=engine, surface_store=store)
+
+def test_store_round_trip(tmp_path):
+    root = str(tmp_path / 'store')
+    s = make(root)
+    p, f = s.price(100.0, 100.0, return_frontier=True)
+    assert s.stats['store_hit'] is False
+    again = make(root)
+    q, g = again.price(100.0, 100.0, return_frontier=True)
+    assert again.stats['store_hit'] is True
+    assert q == pytest.approx(p, rel=1e-12)
+    assert len(g) == len(f)
+    for a, b in zip(f, g):
+        assert np.array_equal(np.asarray(a), np.asarray(b))
+    st = SurfaceStore(root).open(surface_key(s))
+    assert st.price(0, 100.0, 100.0) == pytest.approx(p, rel=1e-12)
+
+def test_store_key_separates_engines(tmp_path):
+    root = str(tmp_path / 'store')
+    make(root).price(100.0, 100.0)
+    other = make(root, engine='sparse')
+    other.price(100.0, 100.0)
+    assert other.stats['store_hit'] is False
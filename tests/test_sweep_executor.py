@@ -0,0 +1,43 @@
+import csv
+
+from sweep_executor import run_sweep
+
+CALLS = []
+
+def square(x, scale=1):
+    CALLS.append(x)
+    return {"y": scale * x * x}
+
+def points(xs, scale=1):
+    return [({"x": x}, {"x": x, "scale": scale}) for x in xs]
+
+def test_resume_skips_rows_already_done(tmp_path):
+    out = str(tmp_path / "sweep.csv")
+    CALLS.clear()
+    run_sweep(square, points([1, 2, 3]), out_csv=out)
+    assert CALLS == [1, 2, 3]
+    CALLS.clear()
+    rows = run_sweep(square, points([1, 2, 3, 4, 5]), out_csv=out)
+    assert CALLS == [4, 5]
+    assert [r["y"] for r in rows] == [1, 4, 9, 16, 25]
+    with open(out, newline="") as f:
+        assert sorted(int(r["x"]) for r in csv.DictReader(f)) == [1, 2, 3, 4, 5]
+
+def test_resume_reruns_on_changed_arguments(tmp_path):
+    out = str(tmp_path / "sweep.csv")
+    run_sweep(square, points([1, 2]), out_csv=out)
+    CALLS.clear()
+    rows = run_sweep(square, points([1, 2], scale=2), out_csv=out)
+    assert CALLS == [1, 2]
+    assert [r["y"] for r in rows] == [2, 8]
+
+def test_resume_drops_truncated_row(tmp_path):
+    out = str(tmp_path / "sweep.csv")
+    run_sweep(square, points([1, 2]), out_csv=out)
+    with open(out) as f:
+        text = f.read()
+    with open(out, "w") as f:
+        f.write(text[:-10])
+    CALLS.clear()
+    run_sweep(square, points([1, 2]), out_csv=out)
+    assert CALLS == [2]